@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Import a bank statement CSV export and match its transfers to residents and open invoices
+Matching uses prebuilt indexes (house codes, resident name tokens, open invoices per resident)
+so each transaction is resolved with a handful of dictionary lookups
+Each import is appended to the payments/match outputs; transactions already imported are skipped
+"""
+
+import argparse
+import csv
+import datetime
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from communities import DEFAULT_COMMUNITY, OPEN_STATUSES, fee_key, in_community, paid_fees, read_csv_rows
+
+DEFAULT_COLUMNS = {
+    'date': 'Date',
+    'reference': 'Description',
+    'amount': 'Credit'
+}
+
+DEFAULT_DATE_FORMATS = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%y', '%d %b %Y']
+
+# Open invoices are matched when the transfer date falls between
+# invoice_date - DAYS_BEFORE and due_date + DAYS_AFTER
+DAYS_BEFORE = 31
+DAYS_AFTER = 90
+
+# Name tokens shared by more residents than this are too common to identify anyone
+MAX_TOKEN_RESIDENTS = 50
+
+NAME_STOPWORDS = {'A/L', 'A/P', 'AL', 'AP', 'BIN', 'BINTI', 'BT', 'BN', 'MR', 'MRS', 'MS', 'DR'}
+
+HOUSE_CODE_PATTERN = re.compile(r'\b([A-Z])\s?-?\s?(\d{1,3})\b')
+TOKEN_PATTERN = re.compile(r'[A-Z]+(?:/[A-Z]+)?')
+
+PAYMENT_FIELDS = ['community_id', 'resident_id', 'payment_date', 'description', 'amount', 'year', 'sheet_name']
+MATCH_FIELDS = [
+    'row_number', 'transaction_date', 'reference', 'amount', 'status', 'match_method',
+    'resident_id', 'invoice_numbers', 'note', 'statement'
+]
+
+SHEET_NAME = 'Bank Statement'
+
+
+def normalize_name_tokens(text: str) -> List[str]:
+    """Split a name or reference into uppercase tokens without honorifics/patronymic markers"""
+    if not text:
+        return []
+    return [t for t in TOKEN_PATTERN.findall(text.upper()) if t not in NAME_STOPWORDS and len(t) > 1]
+
+
+def extract_house_codes(text: str) -> List[str]:
+    """Extract house codes like 'A001', 'A1' or 'B-23' from free-text references"""
+    codes = []
+    for alley, number in HOUSE_CODE_PATTERN.findall(text.upper()):
+        code = f"{alley}{int(number):03d}"
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def parse_amount(value: str) -> Optional[float]:
+    """Parse a statement amount like 'RM 1,234.50'"""
+    if value is None:
+        return None
+    cleaned = value.replace('RM', '').replace(',', '').strip()
+    if not cleaned:
+        return None
+    try:
+        return round(float(cleaned), 2)
+    except ValueError:
+        return None
+
+
+def parse_date(value: str, date_formats: List[str]) -> Optional[datetime.date]:
+    """Parse a statement date trying each configured format"""
+    value = (value or '').strip()
+    for date_format in date_formats:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class ResidentMatcher:
+    """Prebuilt lookup indexes over one community's residents and their open invoices"""
+
+    def __init__(self, residents: List[Dict], invoices: List[Dict], payments: List[Dict] = (),
+                 days_before: int = DAYS_BEFORE, days_after: int = DAYS_AFTER,
+                 community_id: str = DEFAULT_COMMUNITY):
+        self.days_before = datetime.timedelta(days=days_before)
+        self.days_after = datetime.timedelta(days=days_after)
+
+        # Resident IDs repeat across communities, so rows from other communities are left out
+        self.community_id = community_id
+        residents = [r for r in residents if in_community(r, community_id)]
+        invoices = [i for i in invoices if in_community(i, community_id)]
+        payments = [p for p in payments if in_community(p, community_id)]
+
+        self.resident_ids = set()
+        self.name_tokens: Dict[str, set] = {}
+        self.token_index: Dict[str, set] = {}
+
+        for resident in residents:
+            resident_id = resident['resident_id']
+            self.resident_ids.add(resident_id)
+            tokens = set(normalize_name_tokens(resident.get('resident_name', '')))
+            self.name_tokens[resident_id] = tokens
+            for token in tokens:
+                self.token_index.setdefault(token, set()).add(resident_id)
+
+        paid = paid_fees(payments, community_id)
+
+        # Open invoices per resident, oldest due date first
+        self.open_invoices: Dict[str, List[Dict]] = {}
+        for invoice in invoices:
+            if invoice['status'] not in OPEN_STATUSES:
+                continue
+            if fee_key(invoice) in paid:
+                continue
+            self.open_invoices.setdefault(invoice['resident_id'], []).append({
+                'invoice_number': invoice['invoice_number'],
+                'description': invoice['description'],
+                'amount': round(float(invoice['amount']), 2),
+                'invoice_date': datetime.date.fromisoformat(invoice['invoice_date']),
+                'due_date': datetime.date.fromisoformat(invoice['due_date'])
+            })
+        for open_list in self.open_invoices.values():
+            open_list.sort(key=lambda i: (i['due_date'], i['invoice_number']))
+
+    def find_resident(self, reference: str, amount: float, date: Optional[datetime.date]):
+        """Resolve a reference to a single resident, returning (resident_id, method, note)"""
+        codes = [c for c in extract_house_codes(reference) if c in self.resident_ids]
+        if len(codes) == 1:
+            return codes[0], 'house_code', ''
+        if len(codes) > 1:
+            # Prefer the only house whose open invoices explain the amount
+            explained = [c for c in codes if self.match_invoices(c, amount, date)]
+            if len(explained) == 1:
+                return explained[0], 'house_code+amount', ''
+            return None, None, f"ambiguous house codes: {' '.join(codes)}"
+
+        scores: Dict[str, int] = {}
+        for token in set(normalize_name_tokens(reference)):
+            candidates = self.token_index.get(token)
+            if not candidates or len(candidates) > MAX_TOKEN_RESIDENTS:
+                continue
+            for resident_id in candidates:
+                scores[resident_id] = scores.get(resident_id, 0) + 1
+
+        qualified = []
+        for resident_id, score in scores.items():
+            name_size = len(self.name_tokens[resident_id])
+            if score >= min(2, name_size) and score / name_size >= 0.6:
+                qualified.append((score, resident_id))
+        if not qualified:
+            return None, None, 'no house code or name match'
+
+        qualified.sort(reverse=True)
+        best_score = qualified[0][0]
+        best = [resident_id for score, resident_id in qualified if score == best_score]
+        if len(best) == 1:
+            return best[0], 'name', ''
+
+        explained = [r for r in best if self.match_invoices(r, amount, date)]
+        if len(explained) == 1:
+            return explained[0], 'name+amount', ''
+        return None, None, f"ambiguous name match: {' '.join(sorted(best))}"
+
+    def in_window(self, invoice: Dict, date: Optional[datetime.date]) -> bool:
+        """Check a transfer date against the invoice's matching window"""
+        if date is None:
+            return True
+        return invoice['invoice_date'] - self.days_before <= date <= invoice['due_date'] + self.days_after
+
+    def match_invoices(self, resident_id: str, amount: float,
+                       date: Optional[datetime.date]) -> List[Dict]:
+        """Find the open invoice(s) a transfer settles: one exact amount, else oldest-first sum"""
+        open_list = [i for i in self.open_invoices.get(resident_id, []) if self.in_window(i, date)]
+
+        for invoice in open_list:
+            if abs(invoice['amount'] - amount) < 0.005:
+                return [invoice]
+
+        # Residents often pay several months in one transfer
+        settled = []
+        total = 0.0
+        for invoice in open_list:
+            settled.append(invoice)
+            total = round(total + invoice['amount'], 2)
+            if abs(total - amount) < 0.005:
+                return settled
+            if total > amount:
+                break
+        return []
+
+    def settle(self, resident_id: str, invoices: List[Dict]):
+        """Remove settled invoices so later transfers cannot match them again"""
+        numbers = {i['invoice_number'] for i in invoices}
+        self.open_invoices[resident_id] = [
+            i for i in self.open_invoices.get(resident_id, []) if i['invoice_number'] not in numbers
+        ]
+
+
+def read_statement(statement_file: str, columns: Dict[str, str], date_formats: List[str],
+                   delimiter: str = ',', skip_rows: int = 0) -> Iterator[Dict]:
+    """Stream credit transactions out of a bank statement CSV"""
+    reference_columns = [c.strip() for c in columns['reference'].split(',')]
+
+    with open(statement_file, 'r', encoding='utf-8-sig', newline='') as f:
+        for _ in range(skip_rows):
+            next(f, None)
+
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row_number, row in enumerate(reader, start=skip_rows + 2):
+            amount = parse_amount(row.get(columns['amount']))
+            if not amount or amount <= 0:
+                continue  # debits, balances and blank lines
+            reference = ' '.join((row.get(c) or '').strip() for c in reference_columns).strip()
+            yield {
+                'row_number': row_number,
+                'date': parse_date(row.get(columns['date']), date_formats),
+                'reference': reference,
+                'amount': amount
+            }
+
+
+def transaction_key(transaction_date: Optional[str], reference: str, amount) -> tuple:
+    """Identity of a transfer across imports: (date, reference, amount)"""
+    return transaction_date or '', reference, f"{float(amount):.2f}"
+
+
+def read_imported_transactions(matches_file: str) -> Counter:
+    """Count the transactions recorded by earlier imports, by transaction_key()"""
+    if not Path(matches_file).exists():
+        return Counter()
+    return Counter(transaction_key(row['transaction_date'], row['reference'], row['amount'])
+                   for row in read_csv_rows(matches_file))
+
+
+def match_transactions(transactions: Iterator[Dict], matcher: ResidentMatcher,
+                       payments_writer, matches_writer, imported: Counter = None,
+                       statement: str = '') -> Dict[str, int]:
+    """Match each transaction and write payment/match rows as they are produced"""
+    counts = {'matched_invoice': 0, 'matched_resident': 0, 'unmatched': 0, 'already_imported': 0}
+    imported = imported if imported is not None else Counter()
+
+    for txn in transactions:
+        date = txn['date']
+        amount = txn['amount']
+        payment_date = date.strftime('%Y-%m-%d') if date else None
+
+        # Overlapping statements repeat transfers; identical transfers within one statement are kept
+        key = transaction_key(payment_date, txn['reference'], amount)
+        if imported[key]:
+            imported[key] -= 1
+            counts['already_imported'] += 1
+            continue
+        resident_id, method, note = matcher.find_resident(txn['reference'], amount, date)
+
+        invoices = []
+        if resident_id:
+            invoices = matcher.match_invoices(resident_id, amount, date)
+            if invoices:
+                matcher.settle(resident_id, invoices)
+                counts['matched_invoice'] += 1
+                status = 'MATCHED'
+                for invoice in invoices:
+                    payments_writer.writerow({
+                        'community_id': matcher.community_id,
+                        'resident_id': resident_id,
+                        'payment_date': payment_date,
+                        'description': invoice['description'],
+                        'amount': invoice['amount'],
+                        'year': date.year if date else invoice['invoice_date'].year,
+                        'sheet_name': SHEET_NAME
+                    })
+            else:
+                counts['matched_resident'] += 1
+                status = 'RESIDENT_ONLY'
+                note = 'no open invoice matches amount/date'
+                payments_writer.writerow({
+                    'community_id': matcher.community_id,
+                    'resident_id': resident_id,
+                    'payment_date': payment_date,
+                    'description': 'Bank Transfer',
+                    'amount': amount,
+                    'year': date.year if date else None,
+                    'sheet_name': SHEET_NAME
+                })
+        else:
+            counts['unmatched'] += 1
+            status = 'UNMATCHED'
+
+        matches_writer.writerow({
+            'row_number': txn['row_number'],
+            'transaction_date': payment_date,
+            'reference': txn['reference'],
+            'amount': amount,
+            'status': status,
+            'match_method': method,
+            'resident_id': resident_id,
+            'invoice_numbers': ' '.join(i['invoice_number'] for i in invoices),
+            'note': note,
+            'statement': statement
+        })
+
+    return counts
+
+
+def open_appending_writer(path: str, fieldnames: List[str]):
+    """Open a CSV for appending, writing the header on first use (existing files keep their columns)"""
+    write_header = not Path(path).exists() or Path(path).stat().st_size == 0
+    if not write_header:
+        with open(path, 'r', encoding='utf-8') as f:
+            fieldnames = next(csv.reader(f))
+    f = open(path, 'a', newline='', encoding='utf-8')
+    writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+    if write_header:
+        writer.writeheader()
+    return f, writer
+
+
+def import_bank_statement(statement_file: str, residents_file: str, invoices_file: str,
+                          payments_output: str, matches_output: str,
+                          columns: Dict[str, str] = None, date_formats: List[str] = None,
+                          delimiter: str = ',', skip_rows: int = 0,
+                          payments_files: List[str] = (), community_id: str = DEFAULT_COMMUNITY) -> Dict[str, int]:
+    """Match a community's bank statement against its residents/unpaid invoices and append the results"""
+    columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+    date_formats = date_formats or DEFAULT_DATE_FORMATS
+
+    # Fees settled by earlier imports are paid too
+    paid_files = list(payments_files)
+    if Path(payments_output).exists() and payments_output not in paid_files:
+        paid_files.append(payments_output)
+    payments = [row for path in paid_files for row in read_csv_rows(path)]
+
+    matcher = ResidentMatcher(read_csv_rows(residents_file), read_csv_rows(invoices_file), payments,
+                              community_id=community_id)
+    imported = read_imported_transactions(matches_output)
+    transactions = read_statement(statement_file, columns, date_formats, delimiter, skip_rows)
+
+    pf, payments_writer = open_appending_writer(payments_output, PAYMENT_FIELDS)
+    mf, matches_writer = open_appending_writer(matches_output, MATCH_FIELDS)
+    with pf, mf:
+        return match_transactions(transactions, matcher, payments_writer, matches_writer, imported,
+                                  Path(statement_file).name)
+
+
+class _NullWriter:
+    """csv writer stand-in used by the benchmark"""
+
+    def writerow(self, row):
+        pass
+
+
+def benchmark(resident_count: int = 10000, transaction_count: int = 100000):
+    """Time matching synthetic transactions against synthetic residents"""
+    rng = random.Random(42)
+    first_names = [''.join(rng.choice('ABCDEFGHIJKLMNOPRSTUWYZ') for _ in range(6)) for _ in range(2000)]
+    residents = []
+    invoices = []
+    invoice_id = 1
+    for n in range(resident_count):
+        alley = chr(ord('A') + n // 999)
+        resident_id = f"{alley}{n % 999 + 1:03d}"
+        residents.append({
+            'resident_id': resident_id,
+            'resident_name': f"{rng.choice(first_names)} {rng.choice(first_names)} BIN {rng.choice(first_names)}"
+        })
+        for month in range(1, 13):
+            invoices.append({
+                'invoice_number': f"INV-2025-{invoice_id:06d}",
+                'resident_id': resident_id,
+                'description': f"Guard Fee - {datetime.date(2025, month, 1):%B} 2025",
+                'amount': '30.0',
+                'status': 'PENDING',
+                'invoice_date': f"2025-{month:02d}-01",
+                'due_date': f"2025-{month:02d}-28"
+            })
+            invoice_id += 1
+
+    transactions = []
+    for row_number in range(transaction_count):
+        resident = rng.choice(residents)
+        if row_number % 2:
+            reference = f"IBG TRANSFER {resident['resident_id']} GUARD FEE"
+        else:
+            reference = f"DUITNOW {resident['resident_name']}"
+        transactions.append({
+            'row_number': row_number + 2,
+            'date': datetime.date(2025, rng.randint(1, 12), rng.randint(1, 28)),
+            'reference': reference,
+            'amount': rng.choice([30.0, 60.0, 90.0])
+        })
+
+    start = time.perf_counter()
+    matcher = ResidentMatcher(residents, invoices)
+    built = time.perf_counter()
+    counts = match_transactions(iter(transactions), matcher, _NullWriter(), _NullWriter())
+    done = time.perf_counter()
+
+    print(f"Indexed {resident_count} residents / {len(invoices)} invoices in {built - start:.2f}s")
+    print(f"Matched {transaction_count} transactions in {done - built:.2f}s")
+    for status, count in counts.items():
+        print(f"  {status}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import a bank statement and match payments to residents')
+    parser.add_argument('statement', nargs='?', help='Bank statement CSV export')
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY,
+                        help='Community whose account the statement is from')
+    parser.add_argument('--residents', default='residents_unique_id.csv')
+    parser.add_argument('--invoices', default='invoices_for_all_residents.csv')
+    parser.add_argument('--payments', action='append',
+                        help='Recorded payments CSV (repeatable) whose fees are already paid, '
+                             'default payments_unique_id.csv')
+    parser.add_argument('--payments-output', default='bank_payments.csv',
+                        help='Matched payments are appended here; fees already in it count as paid')
+    parser.add_argument('--matches-output', default='bank_matches.csv',
+                        help='Every transaction is appended here; transactions already in it are skipped')
+    parser.add_argument('--date-column', default=DEFAULT_COLUMNS['date'])
+    parser.add_argument('--reference-column', default=DEFAULT_COLUMNS['reference'],
+                        help='Column(s) holding the transfer reference, comma separated')
+    parser.add_argument('--amount-column', default=DEFAULT_COLUMNS['amount'],
+                        help='Column holding incoming (credit) amounts')
+    parser.add_argument('--date-format', action='append',
+                        help='strptime format for the date column (repeatable)')
+    parser.add_argument('--delimiter', default=',')
+    parser.add_argument('--skip-rows', type=int, default=0,
+                        help='Lines to skip before the header row (bank preamble)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Match 100k synthetic transactions against 10k residents')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+    if not args.statement:
+        parser.error('a statement file is required')
+
+    columns = {
+        'date': args.date_column,
+        'reference': args.reference_column,
+        'amount': args.amount_column
+    }
+    counts = import_bank_statement(
+        args.statement, args.residents, args.invoices,
+        args.payments_output, args.matches_output,
+        columns, args.date_format, args.delimiter, args.skip_rows,
+        args.payments or ['payments_unique_id.csv'], args.community
+    )
+
+    print(f"Processed {sum(counts.values())} incoming transfers from {args.statement}")
+    print(f"  Matched to invoices: {counts['matched_invoice']}")
+    print(f"  Matched to resident only: {counts['matched_resident']}")
+    print(f"  Unmatched: {counts['unmatched']}")
+    print(f"  Already imported (skipped): {counts['already_imported']}")
+    print(f"\nPayments with dates appended to: {args.payments_output}")
+    print(f"Match report appended to: {args.matches_output}")
+
+
+if __name__ == "__main__":
+    main()
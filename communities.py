@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Community registry: each community's data lives in its own directory and is processed in isolation
+Resident IDs like "A001" are only unique within a community; (community_id, resident_id) is the key
+Also holds the CSV and fee-status helpers shared by the scripts that read a community's invoices and payments
+"""
+
+import csv
+import datetime
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+COMMUNITIES_FILE = 'communities.json'
+
+# Community the original single-community CSVs and workbook belong to
+DEFAULT_COMMUNITY = 'halya1'
+
+# Community IDs become partition table names (residents_<id>), so keep them identifier-safe
+COMMUNITY_ID_PATTERN = re.compile(r'^[a-z][a-z0-9_]{0,19}$')
+
+OPEN_STATUSES = {'PENDING', 'OVERDUE'}
+
+
+def validate_community_id(community_id: str) -> str:
+    """Check a community ID is usable as a key and in partition table names"""
+    if not COMMUNITY_ID_PATTERN.match(community_id or ''):
+        raise ValueError(f"Invalid community ID {community_id!r}: use lowercase letters, digits and _ (max 20)")
+    return community_id
+
+
+def load_communities(registry_file: str = COMMUNITIES_FILE) -> List[Dict]:
+    """Load the community registry, resolving each data_dir relative to the registry file"""
+    registry_path = Path(registry_file).resolve()
+    with open(registry_path, 'r', encoding='utf-8') as f:
+        communities = json.load(f)
+
+    seen = set()
+    for community in communities:
+        community_id = validate_community_id(community['community_id'])
+        if community_id in seen:
+            raise ValueError(f"Duplicate community ID {community_id!r} in {registry_file}")
+        seen.add(community_id)
+
+        community.setdefault('name', community_id)
+        community.setdefault('data_dir', f"communities/{community_id}")
+        community.setdefault('fee_templates', 'payments_rows-3.csv')
+        community['data_path'] = str(registry_path.parent / community['data_dir'])
+
+    return communities
+
+
+def get_community(community_id: str, registry_file: str = COMMUNITIES_FILE) -> Dict:
+    """Look up a single community in the registry"""
+    for community in load_communities(registry_file):
+        if community['community_id'] == community_id:
+            return community
+    raise KeyError(f"Unknown community {community_id!r}; add it to {registry_file}")
+
+
+def in_community(row: Dict, community_id: str) -> bool:
+    """Whether a CSV row belongs to a community (rows without community_id are the default one)"""
+    return (row.get('community_id') or DEFAULT_COMMUNITY) == community_id
+
+
+def read_csv_rows(path: str) -> List[Dict]:
+    """Read a CSV file into a list of dicts"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def read_community_rows(path: str, community_id: str) -> List[Dict]:
+    """Read the rows of a CSV that belong to one community"""
+    return [row for row in read_csv_rows(path) if in_community(row, community_id)]
+
+
+def fee_key(row: Dict) -> Tuple[str, str]:
+    """Invoices, payments and ledger events refer to the same fee by (resident_id, description)"""
+    return row['resident_id'], row['description']
+
+
+def paid_fees(payments: Iterable[Dict], community_id: str) -> Dict[Tuple[str, str], Dict]:
+    """A community's recorded payments by fee (first row wins); a recorded payment settles the fee
+    whatever its invoice says"""
+    paid = {}
+    for row in payments:
+        if in_community(row, community_id):
+            paid.setdefault(fee_key(row), row)
+    return paid
+
+
+def read_paid_fees(payments_files: Iterable[str], community_id: str) -> Dict[Tuple[str, str], Dict]:
+    """paid_fees() over one or more payments CSVs"""
+    return paid_fees((row for path in payments_files for row in read_csv_rows(path)), community_id)
+
+
+def effective_status(invoice: Dict, as_of: datetime.date) -> str:
+    """PENDING invoices past their due date are OVERDUE (mirrors update_invoice_status())"""
+    status = invoice['status']
+    if status == 'PENDING' and invoice['due_date'] < as_of.isoformat():
+        return 'OVERDUE'
+    return status
+
+
+def fee_status(invoice: Dict, paid: Dict[Tuple[str, str], Dict], as_of: datetime.date) -> str:
+    """Status of an invoiced fee: PAID once a payment is recorded for it, otherwise its effective status"""
+    if invoice['status'] != 'CANCELLED' and fee_key(invoice) in paid:
+        return 'PAID'
+    return effective_status(invoice, as_of)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Write invoice/payment status back into the collection workbook layout
+Streams the source workbook row by row into a write-only workbook, marking each fee cell
+as paid or outstanding via a resident -> fee status index; every other cell, formulas included,
+is copied unchanged
+"""
+
+import argparse
+import csv
+import datetime
+from typing import Dict, List
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.comments import Comment
+from openpyxl.styles import Font, PatternFill
+
+from communities import DEFAULT_COMMUNITY, effective_status, in_community, read_paid_fees
+from normalized_processor import clean_text, create_resident_id, extract_integer, fee_columns
+
+SOURCE_WORKBOOK = "Halya 1_Collection For Hiring Security Guards.xlsx"
+OUTPUT_WORKBOOK = "Halya 1_Collection For Hiring Security Guards - Status.xlsx"
+
+# Data starts at row 7 (index 6), as in normalized_processor.py
+DATA_START_INDEX = 6
+
+STATUS_FILLS = {
+    'PAID': PatternFill('solid', start_color='C6EFCE'),
+    'PENDING': PatternFill('solid', start_color='FFEB9C'),
+    'OVERDUE': PatternFill('solid', start_color='FFC7CE')
+}
+STATUS_FONTS = {
+    'PAID': Font(color='006100'),
+    'PENDING': Font(color='9C5700'),
+    'OVERDUE': Font(color='9C0006', bold=True)
+}
+
+
+def build_status_index(invoices_file: str, payments_files: List[str], as_of: datetime.date,
+                       community_id: str = DEFAULT_COMMUNITY) -> Dict[str, Dict[str, Dict]]:
+    """Index a community's fee status by resident and description: {resident_id: {description: {...}}}"""
+    index: Dict[str, Dict[str, Dict]] = {}
+
+    with open(invoices_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['status'] == 'CANCELLED' or not in_community(row, community_id):
+                continue
+            index.setdefault(row['resident_id'], {})[row['description']] = {
+                'status': effective_status(row, as_of),
+                'amount': float(row['amount']),
+                'invoice_number': row['invoice_number']
+            }
+
+    for (resident_id, description), row in read_paid_fees(payments_files, community_id).items():
+        fee = index.setdefault(resident_id, {}).setdefault(description, {'amount': float(row['amount'])})
+        fee['status'] = 'PAID'
+        if row.get('payment_date'):
+            fee['payment_date'] = row['payment_date']
+
+    return index
+
+
+def status_cell(ws, value, fee: Dict):
+    """Fee cell coloured by status; paid cells keep their value, outstanding ones show the status"""
+    status = fee['status']
+    if status == 'PAID':
+        cell = WriteOnlyCell(ws, value=value)
+        if fee.get('payment_date'):
+            cell.comment = Comment(f"Paid {fee['payment_date']}", 'Halya Payment System')
+    else:
+        cell = WriteOnlyCell(ws, value=status)
+        cell.comment = Comment(f"{fee.get('invoice_number', '')} RM {fee['amount']:.2f} {status.lower()}",
+                               'Halya Payment System')
+    cell.fill = STATUS_FILLS[status]
+    cell.font = STATUS_FONTS[status]
+    return cell
+
+
+def export_workbook(source_file: str, output_file: str, status_index: Dict[str, Dict[str, Dict]]) -> Dict:
+    """Stream the source workbook into a new one with fee statuses filled in"""
+    # Cells are copied from the formula view; residents are identified from the cached values
+    # (house numbers like B9 are formulas such as =B8+1)
+    source = load_workbook(source_file, read_only=True)
+    source_values = load_workbook(source_file, read_only=True, data_only=True)
+    output = Workbook(write_only=True)
+    # Copied formulas have no cached values, so have Excel recalculate them on open
+    output.calculation.fullCalcOnLoad = True
+    counts = {'residents': 0, 'PAID': 0, 'PENDING': 0, 'OVERDUE': 0}
+
+    for source_ws, values_ws in zip(source.worksheets, source_values.worksheets):
+        ws = output.create_sheet(source_ws.title)
+        # Excess payment is a carried-forward credit, not a billable fee
+        columns = {column: description for column, description, _ in fee_columns(source_ws.title)
+                   if description != 'Excess Payment Brought Forward'}
+
+        rows = zip(source_ws.iter_rows(values_only=True), values_ws.iter_rows(values_only=True))
+        for row_index, (cells, values) in enumerate(rows):
+            cells = list(cells)
+            fees = None
+            if row_index >= DATA_START_INDEX and len(values) > 2:
+                house_number = extract_integer(values[1])
+                resident_name = clean_text(values[2])
+                if house_number is not None and resident_name is not None:
+                    resident_id = create_resident_id(clean_text(values[0]), house_number)
+                    fees = status_index.get(resident_id)
+
+            if not fees:
+                ws.append(cells)
+                continue
+
+            counts['residents'] += 1
+            row = []
+            for column, value in enumerate(cells):
+                fee = fees.get(columns.get(column))
+                # Payments are per resident, not per sheet: a fee paid on "Fee Halya 1" (or by bank
+                # transfer) leaves the blank cell on "Sticker" alone, so no sheet's totals change
+                if fee and 'status' in fee and not (fee['status'] == 'PAID' and value in (None, '')):
+                    row.append(status_cell(ws, value, fee))
+                    counts[fee['status']] += 1
+                else:
+                    row.append(value)
+            ws.append(row)
+
+    source.close()
+    source_values.close()
+    output.save(output_file)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write paid/outstanding fee status back into the collection workbook')
+    parser.add_argument('--source', default=SOURCE_WORKBOOK)
+    parser.add_argument('--output', default=OUTPUT_WORKBOOK)
+    parser.add_argument('--invoices', default='invoices_for_all_residents.csv')
+    parser.add_argument('--payments', action='append',
+                        help='Payments CSV (repeatable), default payments_unique_id.csv')
+    parser.add_argument('--as-of', help='Date used to mark PENDING invoices OVERDUE (YYYY-MM-DD)')
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    args = parser.parse_args()
+
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else datetime.date.today()
+    status_index = build_status_index(args.invoices, args.payments or ['payments_unique_id.csv'], as_of,
+                                      args.community)
+    counts = export_workbook(args.source, args.output, status_index)
+
+    print(f"Updated {counts['residents']} resident rows in {args.output}")
+    for status in ('PAID', 'PENDING', 'OVERDUE'):
+        print(f"  {status}: {counts[status]} fee cells")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Export compact, content-hashed JSON snapshots of the normalized CSVs for the frontend
+Writes one index per alley (per-house summaries) plus per-resident payment/invoice histories;
+only alleys whose data changed are rewritten
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+from communities import DEFAULT_COMMUNITY, fee_status, paid_fees, read_community_rows
+
+SNAPSHOT_VERSION = 1
+
+INDEX_FILE = 'index.json'
+
+PAYMENT_COLUMNS = ['payment_date', 'description', 'amount', 'year', 'sheet_name']
+INVOICE_COLUMNS = ['invoice_number', 'invoice_date', 'due_date', 'description', 'amount', 'status', 'year', 'month']
+HOUSE_COLUMNS = [
+    'resident_id', 'house_number', 'resident_name', 'sheet_name', 'total_payments', 'total_amount',
+    'pending_amount', 'overdue_amount', 'history'
+]
+
+
+def to_json_bytes(payload: Dict) -> bytes:
+    """Compact, deterministic JSON encoding"""
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+def content_hash(data: bytes) -> str:
+    """Short content hash used in snapshot file names"""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def number(value: str):
+    """Parse a CSV number, keeping integers as ints"""
+    if value in (None, ''):
+        return None
+    parsed = float(value)
+    return int(parsed) if parsed.is_integer() else parsed
+
+
+def build_snapshots(residents_file: str, payments_files: List[str], invoices_file: str,
+                    as_of: datetime.date, community_id: str = DEFAULT_COMMUNITY) -> Dict[str, Dict]:
+    """Build per-alley snapshots: {alley: {'alley': bytes, 'residents': {path: bytes}}}"""
+    payment_rows = [row for path in payments_files for row in read_community_rows(path, community_id)]
+    payments_by_resident: Dict[str, List[Dict]] = {}
+    for row in payment_rows:
+        payments_by_resident.setdefault(row['resident_id'], []).append(row)
+
+    # Fees with a recorded payment are PAID, so they never count as pending or overdue
+    paid = paid_fees(payment_rows, community_id)
+    invoices_by_resident: Dict[str, List[Dict]] = {}
+    for row in read_community_rows(invoices_file, community_id):
+        row['status'] = fee_status(row, paid, as_of)
+        invoices_by_resident.setdefault(row['resident_id'], []).append(row)
+
+    residents_by_alley: Dict[str, List[Dict]] = {}
+    for row in read_community_rows(residents_file, community_id):
+        residents_by_alley.setdefault(row['alley'], []).append(row)
+
+    snapshots = {}
+    for alley, residents in sorted(residents_by_alley.items()):
+        houses = []
+        resident_files = {}
+
+        for resident in sorted(residents, key=lambda r: int(r['house_number'])):
+            resident_id = resident['resident_id']
+            payments = sorted(payments_by_resident.get(resident_id, []),
+                              key=lambda p: (-int(p['year'] or 0), p['description']))
+            invoices = sorted(invoices_by_resident.get(resident_id, []),
+                              key=lambda i: (i['due_date'], i['invoice_number']))
+
+            history = to_json_bytes({
+                'v': SNAPSHOT_VERSION,
+                'resident_id': resident_id,
+                'payments': {
+                    'columns': PAYMENT_COLUMNS,
+                    'rows': [[p['payment_date'] or None, p['description'], number(p['amount']),
+                              number(p['year']), p['sheet_name']] for p in payments]
+                },
+                'invoices': {
+                    'columns': INVOICE_COLUMNS,
+                    'rows': [[i['invoice_number'], i['invoice_date'], i['due_date'], i['description'],
+                              number(i['amount']), i['status'], number(i['year']), number(i['month'])]
+                             for i in invoices]
+                }
+            })
+            history_path = f"residents/{resident_id}.{content_hash(history)}.json"
+            resident_files[history_path] = history
+
+            houses.append([
+                resident_id,
+                int(resident['house_number']),
+                resident['resident_name'],
+                resident['sheet_name'],
+                len(payments),
+                round(sum(float(p['amount']) for p in payments), 2),
+                round(sum(float(i['amount']) for i in invoices if i['status'] == 'PENDING'), 2),
+                round(sum(float(i['amount']) for i in invoices if i['status'] == 'OVERDUE'), 2),
+                history_path
+            ])
+
+        snapshots[alley] = {
+            'alley': to_json_bytes({
+                'v': SNAPSHOT_VERSION,
+                'alley': alley,
+                'houses': {'columns': HOUSE_COLUMNS, 'rows': houses}
+            }),
+            'residents': resident_files,
+            'resident_count': len(houses),
+            'payment_count': sum(h[4] for h in houses)
+        }
+
+    return snapshots
+
+
+def read_index(output_dir: str) -> Dict:
+    """Load the index written by the previous export, if any"""
+    try:
+        with open(os.path.join(output_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return index if index.get('v') == SNAPSHOT_VERSION else {}
+
+
+def history_files(alley_path: Path) -> set:
+    """Resident history files referenced by a previously written alley snapshot"""
+    try:
+        with open(alley_path, 'r', encoding='utf-8') as f:
+            houses = json.load(f)['houses']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return set()
+    column = houses['columns'].index('history')
+    return {row[column] for row in houses['rows']}
+
+
+def write_file(path: Path, data: bytes):
+    """Write atomically so static hosting never serves a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def export_snapshots(residents_file: str, payments_files: List[str], invoices_file: str,
+                     output_dir: str, as_of: datetime.date = None, force: bool = False,
+                     community_id: str = DEFAULT_COMMUNITY) -> Dict:
+    """Write snapshots for changed alleys and a fresh index; returns export statistics"""
+    as_of = as_of or datetime.date.today()
+    snapshots = build_snapshots(residents_file, payments_files, invoices_file, as_of, community_id)
+    previous = read_index(output_dir).get('alleys', {})
+    output = Path(output_dir)
+
+    alleys = {}
+    stale_files = set()
+    written = []
+    for alley, snapshot in snapshots.items():
+        alley_path = f"alleys/{alley}.{content_hash(snapshot['alley'])}.json"
+        alleys[alley] = {
+            'file': alley_path,
+            'residents': snapshot['resident_count'],
+            'payments': snapshot['payment_count']
+        }
+
+        old = previous.get(alley)
+        if not force and old and old['file'] == alley_path and (output / alley_path).exists():
+            continue
+
+        for path, data in snapshot['residents'].items():
+            if force or not (output / path).exists():
+                write_file(output / path, data)
+        write_file(output / alley_path, snapshot['alley'])
+        written.append(alley)
+
+        if old and old['file'] != alley_path:
+            stale_files.add(old['file'])
+            stale_files.update(history_files(output / old['file']) - set(snapshot['residents']))
+
+    # Alleys that disappeared from the data
+    for alley, old in previous.items():
+        if alley not in snapshots:
+            stale_files.add(old['file'])
+            stale_files.update(history_files(output / old['file']))
+            written.append(alley)
+
+    index = {
+        'v': SNAPSHOT_VERSION,
+        'community_id': community_id,
+        'generated_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'as_of': as_of.isoformat(),
+        'total_residents': sum(a['residents'] for a in alleys.values()),
+        'total_payments': sum(a['payments'] for a in alleys.values()),
+        'alleys': alleys
+    }
+    write_file(output / INDEX_FILE, json.dumps(index, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+
+    # Remove superseded files only once the new index points away from them
+    for path in stale_files:
+        (output / path).unlink(missing_ok=True)
+
+    return {'alleys': len(alleys), 'written': written, 'removed': len(stale_files)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export static JSON snapshots for the frontend')
+    parser.add_argument('--residents', default='residents_unique_id.csv')
+    parser.add_argument('--payments', action='append',
+                        help='Payments CSV (repeatable), default payments_unique_id.csv')
+    parser.add_argument('--invoices', default='invoices_for_all_residents.csv')
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    parser.add_argument('--output', help='Output directory (default public/data/<community>, served as /data/<community>)')
+    parser.add_argument('--as-of', help='Date used to mark PENDING invoices OVERDUE (YYYY-MM-DD)')
+    parser.add_argument('--force', action='store_true', help='Rewrite every alley')
+    args = parser.parse_args()
+
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else None
+    output = args.output or f"public/data/{args.community}"
+    result = export_snapshots(args.residents, args.payments or ['payments_unique_id.csv'], args.invoices,
+                              output, as_of, args.force, args.community)
+
+    print(f"Exported snapshots for {result['alleys']} alleys to {output}")
+    if result['written']:
+        print(f"  Rewritten alleys: {', '.join(result['written'])}")
+    else:
+        print("  No alley data changed")
+    print(f"  Removed superseded files: {result['removed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,15 @@ Generate invoices from payments data for Halya Payment System
 Converts payment records into invoice records with appropriate dates and status
 """
 
+import argparse
 import csv
 import datetime
 from typing import List, Dict
 import random
 
+from resident_ledger import record_charges
+from communities import DEFAULT_COMMUNITY, in_community
+
 def parse_month_from_description(description: str) -> int:
     """Extract month number from description like 'Guard Fee - April 2025'"""
     month_mapping = {
@@ -72,8 +76,8 @@ def determine_invoice_status(description: str, year: int) -> str:
     
     return 'PENDING'
 
-def generate_invoices_from_payments(payments_file: str, output_file: str):
-    """Generate invoices CSV from payments data"""
+def generate_invoices_from_payments(payments_file: str, output_file: str, community_id: str = DEFAULT_COMMUNITY):
+    """Generate invoices CSV from a community's payments data"""
     
     invoices = []
     invoice_id = 1
@@ -82,6 +86,8 @@ def generate_invoices_from_payments(payments_file: str, output_file: str):
         reader = csv.DictReader(f)
         
         for row in reader:
+            if not in_community(row, community_id):
+                continue
             resident_id = row['resident_id']
             description = row['description']
             amount = float(row['amount'])
@@ -106,6 +112,7 @@ def generate_invoices_from_payments(payments_file: str, output_file: str):
             
             # Create invoice record
             invoice = {
+                'community_id': community_id,
                 'invoice_id': invoice_id,
                 'resident_id': resident_id,
                 'invoice_number': invoice_number,
@@ -126,7 +133,7 @@ def generate_invoices_from_payments(payments_file: str, output_file: str):
     
     # Write to CSV
     fieldnames = [
-        'invoice_id', 'resident_id', 'invoice_number', 'invoice_date', 
+        'community_id', 'invoice_id', 'resident_id', 'invoice_number', 'invoice_date', 
         'due_date', 'description', 'amount', 'status', 'payment_id', 
         'year', 'month', 'created_at', 'updated_at'
     ]
@@ -138,6 +145,11 @@ def generate_invoices_from_payments(payments_file: str, output_file: str):
     
     print(f"Generated {len(invoices)} invoices in {output_file}")
     
+    # Feed charges into the running-balance ledger; these invoices only cover paid fees, so recorded
+    # charges missing from them are left alone, and changed amounts get an adjustment event
+    charges_recorded = record_charges(invoices, community_id)
+    print(f"Recorded {charges_recorded} new or adjusted charges in the resident ledger")
+    
     # Print summary
     status_counts = {}
     for invoice in invoices:
@@ -159,8 +171,13 @@ def generate_invoices_from_payments(payments_file: str, output_file: str):
         print(f"  {year}: {year_counts[year]}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate invoices from a community's payments")
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    args = parser.parse_args()
+
     # Generate invoices from the main payments file
     generate_invoices_from_payments(
         'payments_unique_id.csv', 
-        'invoices_generated.csv'
+        'invoices_generated.csv',
+        args.community
     )
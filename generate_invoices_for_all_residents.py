@@ -4,10 +4,14 @@ Generate invoices for all residents based on the 8 payment types from payments_r
 This creates invoices for all residents so we can track who has paid and who hasn't
 """
 
+import argparse
 import csv
 import datetime
 from typing import List, Dict
 
+from resident_ledger import record_charges
+from communities import DEFAULT_COMMUNITY, in_community
+
 def parse_month_from_description(description: str) -> int:
     """Extract month number from description like 'Guard Fee - April 2025'"""
     month_mapping = {
@@ -47,8 +51,9 @@ def generate_invoice_number(invoice_id: int, year: int) -> str:
     """Generate invoice number in format INV-YYYY-XXXXXX"""
     return f"INV-{year}-{invoice_id:06d}"
 
-def generate_invoices_for_all_residents(payment_template_file: str, residents_file: str, output_file: str):
-    """Generate invoices for all residents based on the 8 payment types"""
+def generate_invoices_for_all_residents(payment_template_file: str, residents_file: str, output_file: str,
+                                        community_id: str = DEFAULT_COMMUNITY):
+    """Generate invoices for all of a community's residents based on the 8 payment types"""
     
     # Read the 8 payment templates
     payment_templates = []
@@ -66,7 +71,8 @@ def generate_invoices_for_all_residents(payment_template_file: str, residents_fi
     with open(residents_file, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            residents.append(row['resident_id'])
+            if in_community(row, community_id):
+                residents.append(row['resident_id'])
     
     print(f"Found {len(payment_templates)} payment templates")
     print(f"Found {len(residents)} residents")
@@ -96,6 +102,7 @@ def generate_invoices_for_all_residents(payment_template_file: str, residents_fi
             
             # Create invoice record
             invoice = {
+                'community_id': community_id,
                 'invoice_id': invoice_id,
                 'resident_id': resident_id,
                 'invoice_number': invoice_number,
@@ -116,7 +123,7 @@ def generate_invoices_for_all_residents(payment_template_file: str, residents_fi
     
     # Write to CSV
     fieldnames = [
-        'invoice_id', 'resident_id', 'invoice_number', 'invoice_date', 
+        'community_id', 'invoice_id', 'resident_id', 'invoice_number', 'invoice_date', 
         'due_date', 'description', 'amount', 'status', 'payment_id', 
         'year', 'month', 'created_at', 'updated_at'
     ]
@@ -129,6 +136,10 @@ def generate_invoices_for_all_residents(payment_template_file: str, residents_fi
     print(f"Generated {len(invoices)} invoices in {output_file}")
     print(f"({len(payment_templates)} invoices × {len(residents)} residents = {len(payment_templates) * len(residents)} total)")
     
+    # Feed charges into the running-balance ledger; changed or dropped fees get adjustment/reversal events
+    charges_recorded = record_charges(invoices, community_id, complete=True)
+    print(f"Recorded {charges_recorded} new or adjusted charges in the resident ledger")
+    
     # Print summary by payment type
     print("\nInvoices by Payment Type:")
     for template in payment_templates:
@@ -146,9 +157,14 @@ def generate_invoices_for_all_residents(payment_template_file: str, residents_fi
         print(f"  {year}: {year_counts[year]} invoices")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate invoices for all residents of a community')
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    args = parser.parse_args()
+
     # Generate invoices for all residents based on the 8 payment types
     generate_invoices_for_all_residents(
         'payments_rows-3.csv',  # The 8 payment templates
         'residents_unique_id.csv',  # All residents
-        'invoices_for_all_residents.csv'  # Output file
+        'invoices_for_all_residents.csv',  # Output file
+        args.community
     )
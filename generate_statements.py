@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Batch-render statements or reminder notices for every resident with PENDING/OVERDUE invoices
+Invoices are grouped by resident in one pass, with fees that have a recorded payment marked PAID,
+and rendered in parallel from a cached template; residents whose document inputs haven't changed
+since the last run are skipped
+"""
+
+import argparse
+import csv
+import datetime
+import hashlib
+import html
+import json
+import os
+import string
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from communities import DEFAULT_COMMUNITY, OPEN_STATUSES, fee_status, in_community, read_paid_fees
+
+MANIFEST_FILE = 'manifest.json'
+
+# Residents handed to each worker task; large enough to amortize pickling
+CHUNK_SIZE = 64
+
+DEFAULT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title - $resident_id</title>
+<style>
+  body { font-family: Arial, sans-serif; color: #1f2937; margin: 40px; }
+  h1 { font-size: 20px; margin-bottom: 4px; }
+  .muted { color: #6b7280; font-size: 13px; }
+  table { border-collapse: collapse; width: 100%; margin-top: 24px; font-size: 14px; }
+  th, td { border-bottom: 1px solid #e5e7eb; padding: 8px; text-align: left; }
+  td.amount, th.amount { text-align: right; }
+  .OVERDUE { color: #b91c1c; font-weight: bold; }
+  .PENDING { color: #b45309; }
+  .PAID { color: #15803d; }
+  .total { font-weight: bold; }
+</style>
+</head>
+<body>
+<h1>Halya Payment System - $title</h1>
+<div class="muted">Security Guard Fee Collection &middot; Statement date $as_of</div>
+<p><strong>$resident_name</strong><br>House $resident_id (Alley $alley, No. $house_number)</p>
+<p>$message</p>
+<table>
+<tr><th>Invoice</th><th>Description</th><th>Due date</th><th>Status</th><th class="amount">Amount (RM)</th></tr>
+$rows
+<tr class="total"><td colspan="4">Outstanding</td><td class="amount">$outstanding</td></tr>
+</table>
+</body>
+</html>
+"""
+
+ROW_TEMPLATE = string.Template(
+    '<tr><td>$invoice_number</td><td>$description</td><td>$due_date</td>'
+    '<td class="$status">$status</td><td class="amount">$amount</td></tr>'
+)
+
+KINDS = {
+    'statement': {
+        'title': 'Statement of Account',
+        'message': 'Below is a summary of your invoices. Please settle the outstanding amount at your earliest convenience.'
+    },
+    'reminder': {
+        'title': 'Payment Reminder',
+        'message': 'Our records show the following invoices are still unpaid. Kindly arrange payment as soon as possible.'
+    }
+}
+
+
+def group_invoices_by_resident(invoices_file: str, as_of: datetime.date, community_id: str = DEFAULT_COMMUNITY,
+                               paid: Dict = None) -> Dict[str, List[Dict]]:
+    """Read the invoices CSV once, grouping a community's invoices by resident with their status
+    (PAID when `paid` records a payment for the fee)"""
+    paid = paid or {}
+    grouped: Dict[str, List[Dict]] = {}
+    with open(invoices_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if not row['resident_id'] or row['status'] == 'CANCELLED' or not in_community(row, community_id):
+                continue
+            grouped.setdefault(row['resident_id'], []).append({
+                'invoice_number': row['invoice_number'],
+                'description': row['description'],
+                'due_date': row['due_date'],
+                'amount': float(row['amount']),
+                'status': fee_status(row, paid, as_of)
+            })
+    return grouped
+
+
+def document_hash(resident: Dict, invoices: List[Dict], as_of: datetime.date, template_hash: str) -> str:
+    """Content hash of everything a resident's document is rendered from"""
+    digest = hashlib.sha256(template_hash.encode('utf-8'))
+    digest.update(json.dumps({
+        'as_of': as_of.isoformat(),
+        'resident_name': resident.get('resident_name') or '',
+        'alley': resident.get('alley') or '',
+        'house_number': str(resident.get('house_number') or '')
+    }, sort_keys=True).encode('utf-8'))
+    for invoice in sorted(invoices, key=lambda i: i['invoice_number']):
+        digest.update(json.dumps(invoice, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def load_template(template_path: Optional[str]) -> string.Template:
+    """Compile the statement template once per process"""
+    if template_path is None:
+        return string.Template(DEFAULT_TEMPLATE)
+    with open(template_path, 'r', encoding='utf-8') as f:
+        return string.Template(f.read())
+
+
+def template_source_hash(template_path: Optional[str]) -> str:
+    """Hash of the template text, so template edits re-render every document"""
+    return hashlib.sha256(load_template(template_path).template.encode('utf-8')).hexdigest()[:16]
+
+
+def render_document(resident: Dict, invoices: List[Dict], kind: str, as_of: datetime.date,
+                    template_path: Optional[str]) -> str:
+    """Render one resident's statement/reminder as HTML"""
+    if kind == 'reminder':
+        invoices = [i for i in invoices if i['status'] in OPEN_STATUSES]
+
+    rows = []
+    for invoice in sorted(invoices, key=lambda i: (i['due_date'], i['invoice_number'])):
+        rows.append(ROW_TEMPLATE.substitute(
+            invoice_number=html.escape(invoice['invoice_number']),
+            description=html.escape(invoice['description']),
+            due_date=invoice['due_date'],
+            status=invoice['status'],
+            amount=f"{invoice['amount']:,.2f}"
+        ))
+    outstanding = sum(i['amount'] for i in invoices if i['status'] in OPEN_STATUSES)
+
+    return load_template(template_path).safe_substitute(
+        title=KINDS[kind]['title'],
+        message=KINDS[kind]['message'],
+        as_of=as_of.isoformat(),
+        resident_id=html.escape(resident['resident_id']),
+        resident_name=html.escape(resident.get('resident_name') or ''),
+        alley=html.escape(resident.get('alley') or ''),
+        house_number=html.escape(str(resident.get('house_number') or '')),
+        rows='\n'.join(rows),
+        outstanding=f"{outstanding:,.2f}"
+    )
+
+
+def html_to_pdf(document: str) -> bytes:
+    """Convert rendered HTML to PDF (requires the optional weasyprint package)"""
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise RuntimeError("PDF output requires weasyprint: pip install weasyprint")
+    return HTML(string=document).write_pdf()
+
+
+def render_chunk(tasks: List[Dict], kind: str, output_format: str, as_of: datetime.date,
+                 template_path: Optional[str]) -> List[Dict]:
+    """Worker: render a chunk of residents and return their file contents"""
+    rendered = []
+    for task in tasks:
+        document = render_document(task['resident'], task['invoices'], kind, as_of, template_path)
+        content = html_to_pdf(document) if output_format == 'pdf' else document.encode('utf-8')
+        rendered.append({'resident_id': task['resident']['resident_id'], 'content': content})
+    return rendered
+
+
+def read_manifest(output: str) -> Dict:
+    """Load the manifest from a previous run, if any"""
+    try:
+        if output.endswith('.zip'):
+            with zipfile.ZipFile(output) as zf:
+                return json.loads(zf.read(MANIFEST_FILE))
+        with open(os.path.join(output, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, KeyError, zipfile.BadZipFile, json.JSONDecodeError):
+        return {}
+
+
+def generate_statements(invoices_file: str, residents_file: str, output: str,
+                        kind: str = 'statement', output_format: str = 'html',
+                        as_of: datetime.date = None, template_path: Optional[str] = None,
+                        workers: Optional[int] = None, force: bool = False,
+                        community_id: str = DEFAULT_COMMUNITY, payments_files: List[str] = ()) -> Dict:
+    """Render documents for all residents with open invoices into a directory or .zip"""
+    as_of = as_of or datetime.date.today()
+    paid = read_paid_fees(payments_files, community_id)
+
+    with open(residents_file, 'r', encoding='utf-8') as f:
+        residents = {row['resident_id']: row for row in csv.DictReader(f) if in_community(row, community_id)}
+
+    grouped = group_invoices_by_resident(invoices_file, as_of, community_id, paid)
+    template_hash = template_source_hash(template_path) + kind + output_format
+
+    previous = {} if force else read_manifest(output).get('documents', {})
+    is_zip = output.endswith('.zip')
+
+    documents = {}
+    tasks = []
+    skipped = 0
+    for resident_id in sorted(grouped):
+        invoices = grouped[resident_id]
+        if not any(i['status'] in OPEN_STATUSES for i in invoices):
+            continue
+
+        resident = residents.get(resident_id, {'resident_id': resident_id})
+        content_hash = document_hash(resident, invoices, as_of, template_hash)
+        filename = f"{resident_id}.{output_format}"
+        documents[resident_id] = {
+            'file': filename,
+            'resident_name': resident.get('resident_name'),
+            'open_invoices': sum(1 for i in invoices if i['status'] in OPEN_STATUSES),
+            'overdue_invoices': sum(1 for i in invoices if i['status'] == 'OVERDUE'),
+            'outstanding': round(sum(i['amount'] for i in invoices if i['status'] in OPEN_STATUSES), 2),
+            'hash': content_hash
+        }
+
+        old = previous.get(resident_id)
+        if old and old['hash'] == content_hash and (is_zip or Path(output, filename).exists()):
+            skipped += 1
+            continue
+        tasks.append({'resident': resident, 'invoices': invoices})
+
+    rendered = {}
+    if tasks:
+        chunks = [tasks[i:i + CHUNK_SIZE] for i in range(0, len(tasks), CHUNK_SIZE)]
+        if len(chunks) == 1 or workers == 1:
+            results = [render_chunk(chunk, kind, output_format, as_of, template_path) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(render_chunk, chunks,
+                                   [kind] * len(chunks), [output_format] * len(chunks),
+                                   [as_of] * len(chunks), [template_path] * len(chunks))
+        for chunk_result in results:
+            for item in chunk_result:
+                rendered[item['resident_id']] = item['content']
+
+    manifest = {
+        'community_id': community_id,
+        'kind': kind,
+        'format': output_format,
+        'as_of': as_of.isoformat(),
+        'generated_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'invoices_file': invoices_file,
+        'payments_files': list(payments_files),
+        'document_count': len(documents),
+        'total_outstanding': round(sum(d['outstanding'] for d in documents.values()), 2),
+        'documents': documents
+    }
+
+    if is_zip:
+        write_zip(output, documents, rendered, manifest)
+    else:
+        write_directory(output, documents, rendered, previous, manifest)
+
+    return {'rendered': len(rendered), 'skipped': skipped, 'documents': len(documents)}
+
+
+def write_directory(output: str, documents: Dict, rendered: Dict, previous: Dict, manifest: Dict):
+    """Write changed documents into a directory and drop ones no longer needed"""
+    Path(output).mkdir(parents=True, exist_ok=True)
+    for resident_id, content in rendered.items():
+        Path(output, documents[resident_id]['file']).write_bytes(content)
+
+    # Residents who have settled everything no longer get a document
+    for resident_id, old in previous.items():
+        if resident_id not in documents:
+            Path(output, old['file']).unlink(missing_ok=True)
+
+    with open(os.path.join(output, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def write_zip(output: str, documents: Dict, rendered: Dict, manifest: Dict):
+    """Write a new zip, copying unchanged documents from the previous archive"""
+    old_zip = zipfile.ZipFile(output) if Path(output).exists() else None
+    tmp_output = output + '.tmp'
+    try:
+        with zipfile.ZipFile(tmp_output, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for resident_id, document in documents.items():
+                if resident_id in rendered:
+                    zf.writestr(document['file'], rendered[resident_id])
+                else:
+                    zf.writestr(document['file'], old_zip.read(document['file']))
+            zf.writestr(MANIFEST_FILE, json.dumps(manifest, indent=2))
+    finally:
+        if old_zip:
+            old_zip.close()
+    os.replace(tmp_output, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render statements/reminders for residents with open invoices')
+    parser.add_argument('--invoices', default='invoices_for_all_residents.csv')
+    parser.add_argument('--residents', default='residents_unique_id.csv')
+    parser.add_argument('--payments', action='append',
+                        help='Recorded payments CSV (repeatable) whose fees are shown as PAID, '
+                             'default payments_unique_id.csv')
+    parser.add_argument('--output', default='statements',
+                        help='Output directory, or a path ending in .zip')
+    parser.add_argument('--kind', choices=sorted(KINDS), default='statement')
+    parser.add_argument('--format', dest='output_format', choices=['html', 'pdf'], default='html')
+    parser.add_argument('--as-of', help='Statement date (YYYY-MM-DD), default today')
+    parser.add_argument('--template', help='Custom HTML template using $placeholders')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-render every document')
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    args = parser.parse_args()
+
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else None
+
+    start = time.perf_counter()
+    result = generate_statements(
+        args.invoices, args.residents, args.output, args.kind, args.output_format,
+        as_of, args.template, args.workers, args.force, args.community,
+        args.payments or ['payments_unique_id.csv']
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{result['documents']} residents with PENDING/OVERDUE invoices")
+    print(f"  Rendered: {result['rendered']}")
+    print(f"  Unchanged (skipped): {result['skipped']}")
+    print(f"Output written to {args.output} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
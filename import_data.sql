@@ -2,15 +2,18 @@
 -- Run this in the Supabase SQL Editor
 
 -- First, let's check if tables exist
-SELECT 'residents' as table_name, COUNT(*) as row_count FROM residents
+SELECT 'residents' as table_name, community_id, COUNT(*) as row_count FROM residents GROUP BY community_id
 UNION ALL
-SELECT 'payments' as table_name, COUNT(*) as row_count FROM payments;
+SELECT 'payments' as table_name, community_id, COUNT(*) as row_count FROM payments GROUP BY community_id;
 
 -- IMPORT INSTRUCTIONS:
 -- The CSV files now use meaningful unique IDs (alley+house_number format).
 -- Use these files for import:
 -- 1. residents_unique_id.csv (147 residents with unique IDs like "A001", "B023")
 -- 2. payments_unique_id.csv (1,540 payments linked by resident_id)
+-- Every row carries a community_id ("halya1"); resident IDs are only unique within a community.
+-- Before importing a new community's CSVs, create its partitions:
+--   SELECT create_community_partitions('halya2', 'Halya 2');
 
 -- To import via Supabase Dashboard:
 -- 1. Go to your Supabase dashboard: https://supabase.com/dashboard/project/dxsjgwsaycdspfjasitz
@@ -25,32 +28,32 @@ SELECT 'payments' as table_name, COUNT(*) as row_count FROM payments;
 -- Sample data for testing (if you want to test with a few records first):
 
 -- Sample resident data (first 5 records with unique IDs)
-INSERT INTO residents (resident_id, alley, house_number, resident_name, sheet_name) VALUES
-('A001', 'A', 1, 'Ameer Shah', 'Fee Halya 1'),
-('A002', 'A', 2, 'Logaruthran A/L Muniappan', 'Fee Halya 1'),
-('A003', 'A', 3, 'Ramohan A/L Narasimma Roa', 'Fee Halya 1'),
-('A004', 'A', 4, 'Muhamad Zaiful Azree Bin Khairi', 'Fee Halya 1'),
-('A005', 'A', 5, 'Uma Rani A/P Rama Rao', 'Fee Halya 1')
-ON CONFLICT (resident_id) DO NOTHING;
+INSERT INTO residents (community_id, resident_id, alley, house_number, resident_name, sheet_name) VALUES
+('halya1', 'A001', 'A', 1, 'Ameer Shah', 'Fee Halya 1'),
+('halya1', 'A002', 'A', 2, 'Logaruthran A/L Muniappan', 'Fee Halya 1'),
+('halya1', 'A003', 'A', 3, 'Ramohan A/L Narasimma Roa', 'Fee Halya 1'),
+('halya1', 'A004', 'A', 4, 'Muhamad Zaiful Azree Bin Khairi', 'Fee Halya 1'),
+('halya1', 'A005', 'A', 5, 'Uma Rani A/P Rama Rao', 'Fee Halya 1')
+ON CONFLICT (community_id, resident_id) DO NOTHING;
 
 -- Sample payment data (first 10 records)
-INSERT INTO payments (resident_id, payment_date, description, amount, year, sheet_name) VALUES
-('A001', NULL, 'Guard Fee - April 2025', 30.00, 2025, 'Fee Halya 1'),
-('A001', NULL, 'Guard Fee - May 2025', 30.00, 2025, 'Fee Halya 1'),
-('A001', NULL, 'Guard Fee - June 2025', 30.00, 2025, 'Fee Halya 1'),
-('A002', NULL, 'Membership Fee', 10.00, 2023, 'Fee Halya 1'),
-('A002', NULL, 'Annual Fee 2023', 50.00, 2023, 'Fee Halya 1'),
-('A002', NULL, 'Annual Fee 2024', 50.00, 2024, 'Fee Halya 1'),
-('A002', NULL, 'Guard Fee - Raya', 30.00, 2025, 'Fee Halya 1'),
-('A002', NULL, 'Guard Fee - April 2025', 30.00, 2025, 'Fee Halya 1'),
-('A002', NULL, 'Guard Fee - May 2025', 30.00, 2025, 'Fee Halya 1'),
-('A002', NULL, 'Guard Fee - June 2025', 30.00, 2025, 'Fee Halya 1')
-ON CONFLICT (id) DO NOTHING;
+INSERT INTO payments (community_id, resident_id, payment_date, description, amount, year, sheet_name) VALUES
+('halya1', 'A001', NULL, 'Guard Fee - April 2025', 30.00, 2025, 'Fee Halya 1'),
+('halya1', 'A001', NULL, 'Guard Fee - May 2025', 30.00, 2025, 'Fee Halya 1'),
+('halya1', 'A001', NULL, 'Guard Fee - June 2025', 30.00, 2025, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Membership Fee', 10.00, 2023, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Annual Fee 2023', 50.00, 2023, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Annual Fee 2024', 50.00, 2024, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Guard Fee - Raya', 30.00, 2025, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Guard Fee - April 2025', 30.00, 2025, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Guard Fee - May 2025', 30.00, 2025, 'Fee Halya 1'),
+('halya1', 'A002', NULL, 'Guard Fee - June 2025', 30.00, 2025, 'Fee Halya 1')
+ON CONFLICT (community_id, id) DO NOTHING;
 
 -- Check the imported data
-SELECT 'residents' as table_name, COUNT(*) as row_count FROM residents
+SELECT 'residents' as table_name, community_id, COUNT(*) as row_count FROM residents GROUP BY community_id
 UNION ALL
-SELECT 'payments' as table_name, COUNT(*) as row_count FROM payments;
+SELECT 'payments' as table_name, community_id, COUNT(*) as row_count FROM payments GROUP BY community_id;
 
 -- Test the views
 SELECT * FROM resident_summary LIMIT 5;
@@ -3,12 +3,17 @@
 Script to process Excel file into normalized tables: residents and payments
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import re
 from datetime import datetime
 
+from resident_ledger import record_payments
+from resident_search import DUPLICATE_THRESHOLD, ResidentSearchIndex, similarity
+from communities import DEFAULT_COMMUNITY
+
 def clean_text(text):
     """Clean text data"""
     if pd.isna(text):
@@ -125,142 +130,72 @@ def process_sticker_sheet(df, sheet_name):
     
     return pd.DataFrame(residents), pd.DataFrame(payments)
 
+# Fee columns shared by both sheets: (column index, payment description, year)
+FEE_COLUMNS = [
+    (4, 'Membership Fee', None),  # year comes from the Membership Fee (Year) column
+    (5, 'Annual Fee 2023', 2023),
+    (6, 'Annual Fee 2024', 2024),
+    (7, 'Annual Fee 2025', 2025),
+    (8, 'Guard Fee - Raya', 2025),
+    (9, 'Guard Fee - April 2025', 2025)
+]
+
+# Additional guard fees and excess payment (only in Fee Halya 1 sheet)
+FEE_HALYA_COLUMNS = [
+    (10, 'Guard Fee - May 2025', 2025),
+    (11, 'Guard Fee - June 2025', 2025),
+    (12, 'Guard Fee - July 2025', 2025),
+    (13, 'Guard Fee - August 2025', 2025),
+    (14, 'Excess Payment Brought Forward', 2025)
+]
+
+def fee_columns(sheet_name):
+    """Fee columns present in a sheet, in column order"""
+    if sheet_name == 'Fee Halya 1':
+        return FEE_COLUMNS + FEE_HALYA_COLUMNS
+    return FEE_COLUMNS
+
 def extract_payments(row, resident_id, sheet_name):
     """Extract all payment records from a resident row"""
     payments = []
     
-    # Membership fee
-    membership_fee = extract_numeric(row.iloc[4])
-    if membership_fee and membership_fee > 0:
-        membership_year = extract_integer(row.iloc[3])
-        payments.append({
-            'resident_id': resident_id,
-            'payment_date': None,  # No specific date in Excel
-            'description': 'Membership Fee',
-            'amount': membership_fee,
-            'year': membership_year,
-            'sheet_name': sheet_name
-        })
-    
-    # Annual fees by year
-    annual_fee_2023 = extract_numeric(row.iloc[5])
-    if annual_fee_2023 and annual_fee_2023 > 0:
-        payments.append({
-            'resident_id': resident_id,
-            'payment_date': None,
-            'description': 'Annual Fee 2023',
-            'amount': annual_fee_2023,
-            'year': 2023,
-            'sheet_name': sheet_name
-        })
-    
-    annual_fee_2024 = extract_numeric(row.iloc[6])
-    if annual_fee_2024 and annual_fee_2024 > 0:
-        payments.append({
-            'resident_id': resident_id,
-            'payment_date': None,
-            'description': 'Annual Fee 2024',
-            'amount': annual_fee_2024,
-            'year': 2024,
-            'sheet_name': sheet_name
-        })
-    
-    annual_fee_2025 = extract_numeric(row.iloc[7])
-    if annual_fee_2025 and annual_fee_2025 > 0:
-        payments.append({
-            'resident_id': resident_id,
-            'payment_date': None,
-            'description': 'Annual Fee 2025',
-            'amount': annual_fee_2025,
-            'year': 2025,
-            'sheet_name': sheet_name
-        })
-    
-    # Guard fees by month
-    guard_fee_raya = extract_numeric(row.iloc[8])
-    if guard_fee_raya and guard_fee_raya > 0:
-        payments.append({
-            'resident_id': resident_id,
-            'payment_date': None,
-            'description': 'Guard Fee - Raya',
-            'amount': guard_fee_raya,
-            'year': 2025,
-            'sheet_name': sheet_name
-        })
-    
-    guard_fee_april = extract_numeric(row.iloc[9])
-    if guard_fee_april and guard_fee_april > 0:
-        payments.append({
-            'resident_id': resident_id,
-            'payment_date': None,
-            'description': 'Guard Fee - April 2025',
-            'amount': guard_fee_april,
-            'year': 2025,
-            'sheet_name': sheet_name
-        })
-    
-    # Additional guard fees (only in Fee Halya 1 sheet)
-    if sheet_name == 'Fee Halya 1':
-        guard_fee_may = extract_numeric(row.iloc[10])
-        if guard_fee_may and guard_fee_may > 0:
-            payments.append({
-                'resident_id': resident_id,
-                'payment_date': None,
-                'description': 'Guard Fee - May 2025',
-                'amount': guard_fee_may,
-                'year': 2025,
-                'sheet_name': sheet_name
-            })
-        
-        guard_fee_june = extract_numeric(row.iloc[11])
-        if guard_fee_june and guard_fee_june > 0:
+    for column, description, year in fee_columns(sheet_name):
+        amount = extract_numeric(row.iloc[column])
+        if amount and amount > 0:
+            if description == 'Membership Fee':
+                year = extract_integer(row.iloc[3])
             payments.append({
                 'resident_id': resident_id,
-                'payment_date': None,
-                'description': 'Guard Fee - June 2025',
-                'amount': guard_fee_june,
-                'year': 2025,
-                'sheet_name': sheet_name
-            })
-        
-        guard_fee_july = extract_numeric(row.iloc[12])
-        if guard_fee_july and guard_fee_july > 0:
-            payments.append({
-                'resident_id': resident_id,
-                'payment_date': None,
-                'description': 'Guard Fee - July 2025',
-                'amount': guard_fee_july,
-                'year': 2025,
-                'sheet_name': sheet_name
-            })
-        
-        guard_fee_august = extract_numeric(row.iloc[13])
-        if guard_fee_august and guard_fee_august > 0:
-            payments.append({
-                'resident_id': resident_id,
-                'payment_date': None,
-                'description': 'Guard Fee - August 2025',
-                'amount': guard_fee_august,
-                'year': 2025,
-                'sheet_name': sheet_name
-            })
-        
-        # Excess payment
-        excess_payment = extract_numeric(row.iloc[14])
-        if excess_payment and excess_payment > 0:
-            payments.append({
-                'resident_id': resident_id,
-                'payment_date': None,
-                'description': 'Excess Payment Brought Forward',
-                'amount': excess_payment,
-                'year': 2025,
+                'payment_date': None,  # No specific date in Excel
+                'description': description,
+                'amount': amount,
+                'year': year,
                 'sheet_name': sheet_name
             })
     
     return payments
 
-def process_excel_file(file_path):
-    """Process Excel file and extract normalized data"""
+def find_name_conflicts(residents_df, threshold=DUPLICATE_THRESHOLD):
+    """Resident IDs listed on several sheets under names that don't look like the same person"""
+    conflicts = []
+    for resident_id, rows in residents_df.groupby('resident_id', sort=True):
+        rows = rows.to_dict('records')
+        for i, row in enumerate(rows):
+            for other in rows[i + 1:]:
+                score = similarity(row['resident_name'], other['resident_name'])
+                if score < threshold:
+                    conflicts.append({
+                        'resident_id': resident_id,
+                        'sheet_name': row['sheet_name'],
+                        'resident_name': row['resident_name'],
+                        'other_sheet_name': other['sheet_name'],
+                        'other_resident_name': other['resident_name'],
+                        'similarity': round(score, 4)
+                    })
+    return conflicts
+
+def process_excel_file(file_path, community_id=DEFAULT_COMMUNITY):
+    """Process Excel file and extract normalized data for one community"""
     
     excel_file = pd.ExcelFile(file_path)
     all_residents = []
@@ -297,61 +232,139 @@ def process_excel_file(file_path):
         combined_residents = pd.concat(all_residents, ignore_index=True)
         combined_payments = pd.concat(all_payments, ignore_index=True)
         
+        # The same house on both sheets should be the same person; report it before keeping the first row
+        name_conflicts = find_name_conflicts(combined_residents)
+        
         # Remove duplicates based on resident_id (in case same resident appears in both sheets)
         combined_residents = combined_residents.drop_duplicates(subset=['resident_id'], keep='first')
         
+        # Resident IDs are only unique within a community
+        combined_residents.insert(0, 'community_id', community_id)
+        combined_payments.insert(0, 'community_id', community_id)
+        
         # Clean up data types for CSV export
         combined_residents['house_number'] = combined_residents['house_number'].astype('Int64')  # nullable integer
         combined_payments['year'] = combined_payments['year'].astype('Int64')  # nullable integer
         
-        return combined_residents, combined_payments
+        return combined_residents, combined_payments, name_conflicts
     else:
-        return None, None
+        return None, None, []
 
 def generate_normalized_schema():
-    """Generate normalized SQL schema with alley+house_number as unique ID"""
+    """Generate normalized SQL schema with community_id+alley+house_number as unique ID"""
     
     schema = """
 -- Normalized SQL Schema for Halya Security Guards Data
 -- Generated from processed Excel data
--- Uses alley+house_number as unique resident identifier
+-- Uses community_id+alley+house_number as unique resident identifier
+-- Tables are list-partitioned by community_id; see create_community_partitions()
+
+-- Trigram matching for fuzzy resident lookup
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Communities table
+CREATE TABLE communities (
+    community_id VARCHAR(20) PRIMARY KEY,  -- e.g., "halya1"
+    name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Residents table
 CREATE TABLE residents (
-    resident_id VARCHAR(10) PRIMARY KEY,  -- e.g., "A001", "B023"
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1' REFERENCES communities(community_id),
+    resident_id VARCHAR(10) NOT NULL,  -- e.g., "A001", "B023" (unique within a community)
     alley VARCHAR(10) NOT NULL,
     house_number INTEGER NOT NULL,
     resident_name VARCHAR(255) NOT NULL,
     sheet_name VARCHAR(100) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(alley, house_number)  -- Ensure alley+house_number is unique
-);
+    PRIMARY KEY (community_id, resident_id),
+    UNIQUE(community_id, alley, house_number)  -- Ensure alley+house_number is unique per community
+) PARTITION BY LIST (community_id);
 
 -- Payments table
 CREATE TABLE payments (
-    id SERIAL PRIMARY KEY,
-    resident_id VARCHAR(10) REFERENCES residents(resident_id) ON DELETE CASCADE,
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1',
+    id SERIAL,
+    resident_id VARCHAR(10) NOT NULL,
     payment_date DATE,
     description VARCHAR(255) NOT NULL,
     amount DECIMAL(10,2) NOT NULL,
     year INTEGER,
     sheet_name VARCHAR(100) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, id),
+    FOREIGN KEY (community_id, resident_id) REFERENCES residents(community_id, resident_id) ON DELETE CASCADE
+) PARTITION BY LIST (community_id);
+
+-- Invoices table
+CREATE TABLE invoices (
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1',
+    invoice_id SERIAL,
+    resident_id VARCHAR(10) NOT NULL,
+    invoice_number VARCHAR(50) NOT NULL,
+    invoice_date DATE NOT NULL,
+    due_date DATE NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    status VARCHAR(20) DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PAID', 'OVERDUE', 'CANCELLED')),
+    payment_id INTEGER,
+    year INTEGER,
+    month INTEGER CHECK (month >= 1 AND month <= 12),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, invoice_id),
+    UNIQUE(community_id, invoice_number),
+    FOREIGN KEY (community_id, resident_id) REFERENCES residents(community_id, resident_id) ON DELETE CASCADE,
+    FOREIGN KEY (community_id, payment_id) REFERENCES payments(community_id, id) ON DELETE SET NULL (payment_id)
+) PARTITION BY LIST (community_id);
+
+-- Create the partitions of residents/payments/invoices for a community.
+-- Each community gets its own tables and indexes, so adding one doesn't touch the others.
+CREATE OR REPLACE FUNCTION create_community_partitions(p_community_id VARCHAR(20), p_name VARCHAR(255))
+RETURNS VOID AS $$
+BEGIN
+    IF p_community_id !~ '^[a-z][a-z0-9_]{0,19}$' THEN
+        RAISE EXCEPTION 'Invalid community ID: %', p_community_id;
+    END IF;
+
+    INSERT INTO communities (community_id, name) VALUES (p_community_id, p_name)
+    ON CONFLICT (community_id) DO NOTHING;
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF residents FOR VALUES IN (%L)',
+                   'residents_' || p_community_id, p_community_id);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF payments FOR VALUES IN (%L)',
+                   'payments_' || p_community_id, p_community_id);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF invoices FOR VALUES IN (%L)',
+                   'invoices_' || p_community_id, p_community_id);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_community_partitions('halya1', 'Halya 1');
 
 -- Indexes for better query performance
+-- Indexes on partitioned tables are created on every community partition
 CREATE INDEX idx_residents_house_number ON residents(house_number);
 CREATE INDEX idx_residents_name ON residents(resident_name);
 CREATE INDEX idx_residents_alley ON residents(alley);
-CREATE INDEX idx_payments_resident_id ON payments(resident_id);
+CREATE INDEX idx_residents_name_trgm ON residents USING GIN (resident_name gin_trgm_ops);
+CREATE INDEX idx_residents_id_trgm ON residents USING GIN (resident_id gin_trgm_ops);
+CREATE INDEX idx_payments_resident_id ON payments(community_id, resident_id);
 CREATE INDEX idx_payments_year ON payments(year);
 CREATE INDEX idx_payments_description ON payments(description);
+CREATE INDEX idx_invoices_resident_id ON invoices(community_id, resident_id);
+CREATE INDEX idx_invoices_status ON invoices(status);
+CREATE INDEX idx_invoices_date ON invoices(invoice_date);
+CREATE INDEX idx_invoices_due_date ON invoices(due_date);
+CREATE INDEX idx_invoices_year_month ON invoices(year, month);
+CREATE INDEX idx_invoices_payment_id ON invoices(community_id, payment_id);
 
 -- View for resident summary with total payments
 CREATE VIEW resident_summary AS
 SELECT 
+    r.community_id,
     r.resident_id,
     r.alley,
     r.house_number,
@@ -361,20 +374,40 @@ SELECT
     SUM(p.amount) as total_amount,
     AVG(p.amount) as avg_payment_amount
 FROM residents r
-LEFT JOIN payments p ON r.resident_id = p.resident_id
-GROUP BY r.resident_id, r.alley, r.house_number, r.resident_name, r.sheet_name;
+LEFT JOIN payments p ON r.community_id = p.community_id AND r.resident_id = p.resident_id
+GROUP BY r.community_id, r.resident_id, r.alley, r.house_number, r.resident_name, r.sheet_name;
 
 -- View for payment summary by type
 CREATE VIEW payment_summary AS
 SELECT 
+    community_id,
     description,
     year,
     COUNT(*) as payment_count,
     SUM(amount) as total_amount,
     AVG(amount) as avg_amount
 FROM payments
-GROUP BY description, year
-ORDER BY year DESC, total_amount DESC;
+GROUP BY community_id, description, year
+ORDER BY community_id, year DESC, total_amount DESC;
+
+-- View for invoice summary
+CREATE VIEW invoice_summary AS
+SELECT 
+    r.community_id,
+    r.resident_id,
+    r.alley,
+    r.house_number,
+    r.resident_name,
+    COUNT(i.invoice_id) as total_invoices,
+    SUM(CASE WHEN i.status = 'PAID' THEN i.amount ELSE 0 END) as paid_amount,
+    SUM(CASE WHEN i.status = 'PENDING' THEN i.amount ELSE 0 END) as pending_amount,
+    SUM(CASE WHEN i.status = 'OVERDUE' THEN i.amount ELSE 0 END) as overdue_amount,
+    COUNT(CASE WHEN i.status = 'PAID' THEN 1 END) as paid_count,
+    COUNT(CASE WHEN i.status = 'PENDING' THEN 1 END) as pending_count,
+    COUNT(CASE WHEN i.status = 'OVERDUE' THEN 1 END) as overdue_count
+FROM residents r
+LEFT JOIN invoices i ON r.community_id = i.community_id AND r.resident_id = i.resident_id
+GROUP BY r.community_id, r.resident_id, r.alley, r.house_number, r.resident_name;
 
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -395,19 +428,94 @@ CREATE TRIGGER update_payments_updated_at
     BEFORE UPDATE ON payments 
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_invoices_updated_at 
+    BEFORE UPDATE ON invoices 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Function to generate invoice number (numbered per community)
+CREATE OR REPLACE FUNCTION generate_invoice_number(p_community_id VARCHAR(20) DEFAULT 'halya1')
+RETURNS VARCHAR(50) AS $$
+DECLARE
+    next_number INTEGER;
+    invoice_num VARCHAR(50);
+BEGIN
+    SELECT COALESCE(MAX(CAST(SUBSTRING(invoice_number FROM 9) AS INTEGER)), 0) + 1
+    INTO next_number
+    FROM invoices
+    WHERE community_id = p_community_id
+      AND invoice_number LIKE 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-%';
+    
+    invoice_num := 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-' || LPAD(next_number::TEXT, 6, '0');
+    RETURN invoice_num;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to update invoice status based on due date
+CREATE OR REPLACE FUNCTION update_invoice_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Update status to OVERDUE if due date has passed and status is still PENDING
+    IF NEW.due_date < CURRENT_DATE AND NEW.status = 'PENDING' THEN
+        NEW.status := 'OVERDUE';
+    END IF;
+    
+    -- Update status to PAID if payment_id is set
+    IF NEW.payment_id IS NOT NULL AND NEW.status != 'PAID' THEN
+        NEW.status := 'PAID';
+    END IF;
+    
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger to automatically update invoice status
+CREATE TRIGGER update_invoice_status_trigger
+    BEFORE INSERT OR UPDATE ON invoices
+    FOR EACH ROW
+    EXECUTE FUNCTION update_invoice_status();
+
+-- Ranked fuzzy search over one community's resident names and house codes
+-- A query shaped like a house code ("A23", "b-5") also returns that house with score 1
+-- Usage: SELECT * FROM search_residents('logaruthran', 'halya1');
+CREATE OR REPLACE FUNCTION search_residents(query TEXT, p_community_id VARCHAR(20) DEFAULT 'halya1',
+                                            result_limit INTEGER DEFAULT 10)
+RETURNS TABLE (
+    resident_id VARCHAR(10),
+    alley VARCHAR(10),
+    house_number INTEGER,
+    resident_name VARCHAR(255),
+    score REAL
+) AS $$
+    WITH q AS (
+        SELECT CASE WHEN query ~ '^\\s*[A-Za-z]\\s?-?\\s?\\d{1,3}\\s*$'
+                    THEN upper(substring(query FROM '[A-Za-z]'))
+                         || lpad(substring(query FROM '\\d{1,3}')::INTEGER::TEXT, 3, '0')
+               END AS house_code
+    )
+    SELECT r.resident_id, r.alley, r.house_number, r.resident_name,
+           CASE WHEN r.resident_id = q.house_code THEN 1::REAL
+                ELSE GREATEST(similarity(r.resident_name, query), similarity(r.resident_id, query))
+           END AS score
+    FROM residents r, q
+    WHERE r.community_id = p_community_id
+      AND (r.resident_id = q.house_code OR r.resident_name % query OR r.resident_id % query)
+    ORDER BY score DESC, r.resident_id
+    LIMIT result_limit;
+$$ LANGUAGE sql STABLE;
 """
     
     return schema
 
-def main():
-    excel_file = "Halya 1_Collection For Hiring Security Guards.xlsx"
-    
+def main(excel_file="Halya 1_Collection For Hiring Security Guards.xlsx", community_id=DEFAULT_COMMUNITY,
+         write_schema=True):
     if not Path(excel_file).exists():
         print(f"Error: {excel_file} not found!")
         return
     
     # Process the Excel file
-    residents_df, payments_df = process_excel_file(excel_file)
+    residents_df, payments_df, name_conflicts = process_excel_file(excel_file, community_id)
     
     if residents_df is None or payments_df is None:
         print("No data could be extracted from the Excel file.")
@@ -422,6 +530,23 @@ def main():
     print(residents_df.head(10).to_string())
     print(f"\nTotal residents: {len(residents_df)}")
     
+    # Flag residents whose names look like the same person under another house
+    duplicates = ResidentSearchIndex(residents_df.to_dict('records')).find_probable_duplicates()
+    if duplicates:
+        print(f"\nPROBABLE DUPLICATE RESIDENTS ({len(duplicates)}):")
+        for d in duplicates:
+            print(f"  {d['resident_id']} {d['resident_name']} ~ "
+                  f"{d['duplicate_resident_id']} {d['duplicate_resident_name']} ({d['similarity']:.2f})")
+        pd.DataFrame(duplicates).to_csv('probable_duplicate_residents.csv', index=False)
+    
+    # Houses whose name differs between sheets; only the first sheet's name is kept
+    if name_conflicts:
+        print(f"\nRESIDENT NAME CONFLICTS BETWEEN SHEETS ({len(name_conflicts)}):")
+        for c in name_conflicts:
+            print(f"  {c['resident_id']} {c['sheet_name']}: {c['resident_name']} ~ "
+                  f"{c['other_sheet_name']}: {c['other_resident_name']} ({c['similarity']:.2f})")
+        pd.DataFrame(name_conflicts).to_csv('resident_name_conflicts.csv', index=False)
+    
     print("\nPAYMENTS TABLE:")
     print(payments_df.head(10).to_string())
     print(f"\nTotal payments: {len(payments_df)}")
@@ -454,13 +579,19 @@ def main():
     print(f"  - {residents_csv} (Residents table)")
     print(f"  - {payments_csv} (Payments table)")
     
-    # Generate normalized schema
-    schema = generate_normalized_schema()
-    
-    with open('normalized_schema.sql', 'w') as f:
-        f.write(schema)
+    # Feed payments and brought-forward credits into the running-balance ledger; changed or removed
+    # amounts get adjustment/reversal events
+    payments_recorded = record_payments(payments_df.to_dict('records'), community_id, complete=True)
+    print(f"Recorded {payments_recorded} new or adjusted payment/credit events in the resident ledger")
     
-    print("Normalized schema saved to: normalized_schema.sql")
+    # Generate normalized schema (shared by all communities)
+    if write_schema:
+        schema = generate_normalized_schema()
+        
+        with open('normalized_schema.sql', 'w') as f:
+            f.write(schema)
+        
+        print("Normalized schema saved to: normalized_schema.sql")
     
     # Create summary report
     summary = f"""
@@ -468,6 +599,7 @@ NORMALIZED DATA PROCESSING SUMMARY
 ==================================
 
 Source File: {excel_file}
+Community: {community_id}
 Total Residents: {len(residents_df)}
 Total Payments: {len(payments_df)}
 
@@ -492,8 +624,14 @@ Payment Types:
     print("Files generated:")
     print(f"  - {residents_csv} (Residents table for Supabase)")
     print(f"  - {payments_csv} (Payments table for Supabase)")
-    print("  - normalized_schema.sql (Normalized database schema)")
+    if write_schema:
+        print("  - normalized_schema.sql (Normalized database schema)")
     print("  - normalized_summary.txt (Processing report)")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Normalize a community's collection workbook into CSVs")
+    parser.add_argument('excel_file', nargs='?', default="Halya 1_Collection For Hiring Security Guards.xlsx")
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    parser.add_argument('--no-schema', action='store_true', help="Don't rewrite normalized_schema.sql")
+    args = parser.parse_args()
+    main(args.excel_file, args.community, write_schema=not args.no_schema)
@@ -1,67 +1,115 @@
 
 -- Normalized SQL Schema for Halya Security Guards Data
 -- Generated from processed Excel data
--- Uses alley+house_number as unique resident identifier
+-- Uses community_id+alley+house_number as unique resident identifier
+-- Tables are list-partitioned by community_id; see create_community_partitions()
+
+-- Trigram matching for fuzzy resident lookup
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Communities table
+CREATE TABLE communities (
+    community_id VARCHAR(20) PRIMARY KEY,  -- e.g., "halya1"
+    name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Residents table
 CREATE TABLE residents (
-    resident_id VARCHAR(10) PRIMARY KEY,  -- e.g., "A001", "B023"
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1' REFERENCES communities(community_id),
+    resident_id VARCHAR(10) NOT NULL,  -- e.g., "A001", "B023" (unique within a community)
     alley VARCHAR(10) NOT NULL,
     house_number INTEGER NOT NULL,
     resident_name VARCHAR(255) NOT NULL,
     sheet_name VARCHAR(100) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(alley, house_number)  -- Ensure alley+house_number is unique
-);
+    PRIMARY KEY (community_id, resident_id),
+    UNIQUE(community_id, alley, house_number)  -- Ensure alley+house_number is unique per community
+) PARTITION BY LIST (community_id);
 
 -- Payments table
 CREATE TABLE payments (
-    id SERIAL PRIMARY KEY,
-    resident_id VARCHAR(10) REFERENCES residents(resident_id) ON DELETE CASCADE,
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1',
+    id SERIAL,
+    resident_id VARCHAR(10) NOT NULL,
     payment_date DATE,
     description VARCHAR(255) NOT NULL,
     amount DECIMAL(10,2) NOT NULL,
     year INTEGER,
     sheet_name VARCHAR(100) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, id),
+    FOREIGN KEY (community_id, resident_id) REFERENCES residents(community_id, resident_id) ON DELETE CASCADE
+) PARTITION BY LIST (community_id);
 
 -- Invoices table
 CREATE TABLE invoices (
-    invoice_id SERIAL PRIMARY KEY,
-    resident_id VARCHAR(10) REFERENCES residents(resident_id) ON DELETE CASCADE,
-    invoice_number VARCHAR(50) UNIQUE NOT NULL,
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1',
+    invoice_id SERIAL,
+    resident_id VARCHAR(10) NOT NULL,
+    invoice_number VARCHAR(50) NOT NULL,
     invoice_date DATE NOT NULL,
     due_date DATE NOT NULL,
     description VARCHAR(255) NOT NULL,
     amount DECIMAL(10,2) NOT NULL,
     status VARCHAR(20) DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PAID', 'OVERDUE', 'CANCELLED')),
-    payment_id INTEGER REFERENCES payments(id) ON DELETE SET NULL,
+    payment_id INTEGER,
     year INTEGER,
     month INTEGER CHECK (month >= 1 AND month <= 12),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, invoice_id),
+    UNIQUE(community_id, invoice_number),
+    FOREIGN KEY (community_id, resident_id) REFERENCES residents(community_id, resident_id) ON DELETE CASCADE,
+    FOREIGN KEY (community_id, payment_id) REFERENCES payments(community_id, id) ON DELETE SET NULL (payment_id)
+) PARTITION BY LIST (community_id);
+
+-- Create the partitions of residents/payments/invoices for a community.
+-- Each community gets its own tables and indexes, so adding one doesn't touch the others.
+CREATE OR REPLACE FUNCTION create_community_partitions(p_community_id VARCHAR(20), p_name VARCHAR(255))
+RETURNS VOID AS $$
+BEGIN
+    IF p_community_id !~ '^[a-z][a-z0-9_]{0,19}$' THEN
+        RAISE EXCEPTION 'Invalid community ID: %', p_community_id;
+    END IF;
+
+    INSERT INTO communities (community_id, name) VALUES (p_community_id, p_name)
+    ON CONFLICT (community_id) DO NOTHING;
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF residents FOR VALUES IN (%L)',
+                   'residents_' || p_community_id, p_community_id);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF payments FOR VALUES IN (%L)',
+                   'payments_' || p_community_id, p_community_id);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF invoices FOR VALUES IN (%L)',
+                   'invoices_' || p_community_id, p_community_id);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_community_partitions('halya1', 'Halya 1');
 
 -- Indexes for better query performance
+-- Indexes on partitioned tables are created on every community partition
 CREATE INDEX idx_residents_house_number ON residents(house_number);
 CREATE INDEX idx_residents_name ON residents(resident_name);
 CREATE INDEX idx_residents_alley ON residents(alley);
-CREATE INDEX idx_payments_resident_id ON payments(resident_id);
+CREATE INDEX idx_residents_name_trgm ON residents USING GIN (resident_name gin_trgm_ops);
+CREATE INDEX idx_residents_id_trgm ON residents USING GIN (resident_id gin_trgm_ops);
+CREATE INDEX idx_payments_resident_id ON payments(community_id, resident_id);
 CREATE INDEX idx_payments_year ON payments(year);
 CREATE INDEX idx_payments_description ON payments(description);
-CREATE INDEX idx_invoices_resident_id ON invoices(resident_id);
+CREATE INDEX idx_invoices_resident_id ON invoices(community_id, resident_id);
 CREATE INDEX idx_invoices_status ON invoices(status);
 CREATE INDEX idx_invoices_date ON invoices(invoice_date);
 CREATE INDEX idx_invoices_due_date ON invoices(due_date);
 CREATE INDEX idx_invoices_year_month ON invoices(year, month);
-CREATE INDEX idx_invoices_payment_id ON invoices(payment_id);
+CREATE INDEX idx_invoices_payment_id ON invoices(community_id, payment_id);
 
 -- View for resident summary with total payments
 CREATE VIEW resident_summary AS
 SELECT 
+    r.community_id,
     r.resident_id,
     r.alley,
     r.house_number,
@@ -71,24 +119,26 @@ SELECT
     SUM(p.amount) as total_amount,
     AVG(p.amount) as avg_payment_amount
 FROM residents r
-LEFT JOIN payments p ON r.resident_id = p.resident_id
-GROUP BY r.resident_id, r.alley, r.house_number, r.resident_name, r.sheet_name;
+LEFT JOIN payments p ON r.community_id = p.community_id AND r.resident_id = p.resident_id
+GROUP BY r.community_id, r.resident_id, r.alley, r.house_number, r.resident_name, r.sheet_name;
 
 -- View for payment summary by type
 CREATE VIEW payment_summary AS
 SELECT 
+    community_id,
     description,
     year,
     COUNT(*) as payment_count,
     SUM(amount) as total_amount,
     AVG(amount) as avg_amount
 FROM payments
-GROUP BY description, year
-ORDER BY year DESC, total_amount DESC;
+GROUP BY community_id, description, year
+ORDER BY community_id, year DESC, total_amount DESC;
 
 -- View for invoice summary
 CREATE VIEW invoice_summary AS
 SELECT 
+    r.community_id,
     r.resident_id,
     r.alley,
     r.house_number,
@@ -101,8 +151,8 @@ SELECT
     COUNT(CASE WHEN i.status = 'PENDING' THEN 1 END) as pending_count,
     COUNT(CASE WHEN i.status = 'OVERDUE' THEN 1 END) as overdue_count
 FROM residents r
-LEFT JOIN invoices i ON r.resident_id = i.resident_id
-GROUP BY r.resident_id, r.alley, r.house_number, r.resident_name;
+LEFT JOIN invoices i ON r.community_id = i.community_id AND r.resident_id = i.resident_id
+GROUP BY r.community_id, r.resident_id, r.alley, r.house_number, r.resident_name;
 
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -129,8 +179,8 @@ CREATE TRIGGER update_invoices_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
--- Function to generate invoice number
-CREATE OR REPLACE FUNCTION generate_invoice_number()
+-- Function to generate invoice number (numbered per community)
+CREATE OR REPLACE FUNCTION generate_invoice_number(p_community_id VARCHAR(20) DEFAULT 'halya1')
 RETURNS VARCHAR(50) AS $$
 DECLARE
     next_number INTEGER;
@@ -139,7 +189,8 @@ BEGIN
     SELECT COALESCE(MAX(CAST(SUBSTRING(invoice_number FROM 9) AS INTEGER)), 0) + 1
     INTO next_number
     FROM invoices
-    WHERE invoice_number LIKE 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-%';
+    WHERE community_id = p_community_id
+      AND invoice_number LIKE 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-%';
     
     invoice_num := 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-' || LPAD(next_number::TEXT, 6, '0');
     RETURN invoice_num;
@@ -169,3 +220,32 @@ CREATE TRIGGER update_invoice_status_trigger
     BEFORE INSERT OR UPDATE ON invoices
     FOR EACH ROW
     EXECUTE FUNCTION update_invoice_status();
+
+-- Ranked fuzzy search over one community's resident names and house codes
+-- A query shaped like a house code ("A23", "b-5") also returns that house with score 1
+-- Usage: SELECT * FROM search_residents('logaruthran', 'halya1');
+CREATE OR REPLACE FUNCTION search_residents(query TEXT, p_community_id VARCHAR(20) DEFAULT 'halya1',
+                                            result_limit INTEGER DEFAULT 10)
+RETURNS TABLE (
+    resident_id VARCHAR(10),
+    alley VARCHAR(10),
+    house_number INTEGER,
+    resident_name VARCHAR(255),
+    score REAL
+) AS $$
+    WITH q AS (
+        SELECT CASE WHEN query ~ '^\s*[A-Za-z]\s?-?\s?\d{1,3}\s*$'
+                    THEN upper(substring(query FROM '[A-Za-z]'))
+                         || lpad(substring(query FROM '\d{1,3}')::INTEGER::TEXT, 3, '0')
+               END AS house_code
+    )
+    SELECT r.resident_id, r.alley, r.house_number, r.resident_name,
+           CASE WHEN r.resident_id = q.house_code THEN 1::REAL
+                ELSE GREATEST(similarity(r.resident_name, query), similarity(r.resident_id, query))
+           END AS score
+    FROM residents r, q
+    WHERE r.community_id = p_community_id
+      AND (r.resident_id = q.house_code OR r.resident_name % query OR r.resident_id % query)
+    ORDER BY score DESC, r.resident_id
+    LIMIT result_limit;
+$$ LANGUAGE sql STABLE;
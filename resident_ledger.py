@@ -0,0 +1,671 @@
+#!/usr/bin/env python3
+"""
+Append-only ledger of charge/payment/credit events with running balances per resident
+Each event comes from a source (one resident's fee); when a source's amount changes or it disappears,
+an adjustment or reversal event for the difference is appended instead of editing history
+Current balances and each source's net amount are persisted after every append, so opening the ledger,
+recording events and current balance lookups never read the event log; history queries load it on first use
+and replay from the nearest per-resident snapshot
+"""
+
+import argparse
+import bisect
+import csv
+import datetime
+import os
+from pathlib import Path
+from typing import Dict, List
+
+from communities import DEFAULT_COMMUNITY, in_community, read_community_rows
+
+LEDGER_FILE = 'ledger_events.csv'
+SNAPSHOT_FILE = 'ledger_snapshots.csv'
+BALANCES_FILE = 'ledger_balances.csv'
+SOURCES_FILE = 'ledger_sources.csv'
+
+# Take a snapshot of a resident's balance after every N events for that resident
+SNAPSHOT_INTERVAL = 16
+
+EVENT_FIELDS = [
+    'seq', 'recorded_at', 'resident_id', 'event_type', 'source_ref',
+    'description', 'amount', 'event_date', 'community_id'
+]
+SNAPSHOT_FIELDS = ['resident_id', 'seq', 'balance', 'event_count']
+BALANCE_FIELDS = ['community_id', 'resident_id', 'seq', 'balance', 'event_count', 'last_event_date']
+SOURCE_FIELDS = ['community_id', 'source_ref', 'resident_id', 'event_type', 'description', 'amount', 'event_date']
+
+# Charges increase what a resident owes, payments and credits reduce it
+EVENT_SIGNS = {'charge': 1, 'payment': -1, 'credit': -1}
+
+EXCESS_PAYMENT_DESCRIPTION = 'Excess Payment Brought Forward'
+
+
+def is_credit_description(description: str) -> bool:
+    """Excess payments carried forward are credits, never billable charges"""
+    return description.strip().lower() == EXCESS_PAYMENT_DESCRIPTION.lower()
+
+
+def signed_amount(event_type: str, amount: float) -> float:
+    """Return the effect an event has on the resident's balance"""
+    return EVENT_SIGNS[event_type] * amount
+
+
+def last_logged_seq(ledger_file: str) -> int:
+    """Seq of the last event in the log, read from the end of the file"""
+    if not Path(ledger_file).exists():
+        return 0
+    with open(ledger_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b''
+        while position > 0 and tail.strip().count(b'\n') < 1:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+    lines = tail.strip().splitlines()
+    if len(lines) < 2 and position == 0:
+        return 0  # header only
+    seq = next(csv.reader([lines[-1].decode('utf-8')]))[0]
+    return int(seq) if seq.isdigit() else 0
+
+
+class ResidentLedger:
+    """Append-only event ledger of one community, with per-resident running balances and snapshots
+
+    Opening a ledger reads only its persisted state (current balance per resident, net amount per source);
+    the event log and snapshots are read on first use by the history queries
+    """
+
+    def __init__(self, ledger_file: str = LEDGER_FILE, snapshot_file: str = SNAPSHOT_FILE,
+                 snapshot_interval: int = SNAPSHOT_INTERVAL, balances_file: str = BALANCES_FILE,
+                 community_id: str = DEFAULT_COMMUNITY, sources_file: str = SOURCES_FILE):
+        self.community_id = community_id
+        self.ledger_file = ledger_file
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.balances_file = balances_file
+        self.sources_file = sources_file
+
+        # State, enough to append and to answer current balances
+        self.last_seq = 0
+        self.balances: Dict[str, float] = {}
+        self.event_counts: Dict[str, int] = {}
+        self.last_seqs: Dict[str, int] = {}
+        self.last_event_dates: Dict[str, str] = {}  # latest explicit event_date per resident
+        # Net amount recorded per source_ref, and the latest event of each source
+        self.source_amounts: Dict[str, float] = {}
+        self.source_events: Dict[str, Dict] = {}
+
+        # History, loaded on first use
+        self.history_loaded = False
+        self._events: List[Dict] = []
+        self.recorded_at: List[str] = []  # per seq, non-decreasing
+        # Per resident: seqs of their events, and (seq, balance, event_count) snapshots
+        self.resident_events: Dict[str, List[int]] = {}
+        self._resident_snapshots: Dict[str, List[tuple]] = {}
+        # Per resident, built on first use: (sorted event dates, balance after each date)
+        self.date_timelines: Dict[str, tuple] = {}
+
+        if not self._load_state():
+            # Missing or stale state is rebuilt from the event log once and saved again
+            self._load_history()
+            self._replay_state()
+            self.write_state()
+
+    @property
+    def events(self) -> List[Dict]:
+        self._load_history()
+        return self._events
+
+    @property
+    def resident_snapshots(self) -> Dict[str, List[tuple]]:
+        self._load_history()
+        return self._resident_snapshots
+
+    def _check_community(self, community_id: str, where: str):
+        # Resident IDs repeat across communities, so one ledger never mixes them
+        if (community_id or DEFAULT_COMMUNITY) != self.community_id:
+            raise ValueError(f"{where} belongs to community {community_id!r}, not {self.community_id!r}")
+
+    def _load_state(self) -> bool:
+        """Load the persisted state; False when it's missing or behind the event log"""
+        logged_seq = last_logged_seq(self.ledger_file)
+        if not logged_seq:
+            return True
+        if not Path(self.balances_file).exists() or not Path(self.sources_file).exists():
+            return False
+
+        with open(self.balances_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if 'last_event_date' not in (reader.fieldnames or []):
+                return False  # written before sources were tracked
+            for row in reader:
+                self._check_community(row['community_id'], f"{self.balances_file} row {row['resident_id']}")
+                resident_id = row['resident_id']
+                self.balances[resident_id] = float(row['balance'])
+                self.event_counts[resident_id] = int(row['event_count'])
+                self.last_seqs[resident_id] = int(row['seq'])
+                if row['last_event_date']:
+                    self.last_event_dates[resident_id] = row['last_event_date']
+
+        with open(self.sources_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                self._check_community(row['community_id'], f"{self.sources_file} row {row['source_ref']}")
+                self.source_amounts[row['source_ref']] = float(row['amount'])
+                self.source_events[row['source_ref']] = {
+                    'resident_id': row['resident_id'],
+                    'event_type': row['event_type'],
+                    'source_ref': row['source_ref'],
+                    'description': row['description'],
+                    'event_date': row['event_date'] or None,
+                    'community_id': self.community_id
+                }
+
+        self.last_seq = max(self.last_seqs.values(), default=0)
+        if self.last_seq != logged_seq:
+            # A run stopped between appending events and saving the state
+            self._reset_state()
+            return False
+        return True
+
+    def _reset_state(self):
+        self.last_seq = 0
+        self.balances, self.event_counts, self.last_seqs, self.last_event_dates = {}, {}, {}, {}
+        self.source_amounts, self.source_events = {}, {}
+
+    def _load_history(self):
+        """Read the event log and snapshots into the history indexes (once)"""
+        if self.history_loaded:
+            return
+        self.history_loaded = True
+
+        if Path(self.ledger_file).exists():
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    event = {
+                        'seq': int(row['seq']),
+                        'recorded_at': row['recorded_at'],
+                        'resident_id': row['resident_id'],
+                        'event_type': row['event_type'],
+                        'source_ref': row['source_ref'],
+                        'description': row['description'],
+                        'amount': float(row['amount']),
+                        'event_date': row['event_date'] or None,
+                        'community_id': row.get('community_id') or DEFAULT_COMMUNITY
+                    }
+                    self._check_community(event['community_id'], f"{self.ledger_file} event {event['seq']}")
+                    self._index_history(event)
+
+        if Path(self.snapshot_file).exists():
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self._resident_snapshots.setdefault(row['resident_id'], []).append(
+                        (int(row['seq']), float(row['balance']), int(row['event_count']))
+                    )
+            for snapshots in self._resident_snapshots.values():
+                snapshots.sort()
+
+    def _replay_state(self):
+        """Rebuild the state from the event log"""
+        self._reset_state()
+        for event in self._events:
+            self._apply(event)
+
+    def _index_history(self, event: Dict):
+        """Add an event to the history indexes"""
+        self._events.append(event)
+        self.recorded_at.append(event['recorded_at'])
+        self.resident_events.setdefault(event['resident_id'], []).append(event['seq'])
+        self.date_timelines.pop(event['resident_id'], None)
+
+    def _apply(self, event: Dict):
+        """Apply an event to the state"""
+        resident_id = event['resident_id']
+        source_ref = event['source_ref']
+        self.last_seq = event['seq']
+        self.balances[resident_id] = round(self.balances.get(resident_id, 0.0)
+                                           + signed_amount(event['event_type'], event['amount']), 2)
+        self.event_counts[resident_id] = self.event_counts.get(resident_id, 0) + 1
+        self.last_seqs[resident_id] = event['seq']
+        if event['event_date'] and event['event_date'] > self.last_event_dates.get(resident_id, ''):
+            self.last_event_dates[resident_id] = event['event_date']
+        self.source_amounts[source_ref] = round(self.source_amounts.get(source_ref, 0.0) + event['amount'], 2)
+        self.source_events[source_ref] = event
+
+    def append(self, events: List[Dict], replace_types=()) -> int:
+        """Record the current amount of each event's source: new sources are appended, sources whose amount
+        changed get an adjustment event for the difference, and sources of `replace_types` missing from
+        `events` (the complete set of those types) get a reversal event"""
+        recorded_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        new_events = []
+        new_snapshots = []
+
+        events = list(events)
+        if replace_types:
+            current = {event['source_ref'] for event in events}
+            events += [
+                dict(event, amount=0.0) for source_ref, event in self.source_events.items()
+                if event['event_type'] in replace_types and source_ref not in current
+            ]
+
+        seen = set()
+        for event in events:
+            if event['event_type'] not in EVENT_SIGNS:
+                raise ValueError(f"Unknown ledger event type: {event['event_type']}")
+            if not in_community(event, self.community_id):
+                raise ValueError(f"Event {event['source_ref']} belongs to community {event['community_id']!r}, "
+                                 f"not {self.community_id!r}")
+            source_ref = event['source_ref']
+            if source_ref in seen:
+                continue
+            seen.add(source_ref)
+
+            difference = round(event['amount'] - self.source_amounts.get(source_ref, 0.0), 2)
+            if abs(difference) < 0.005:
+                continue
+
+            event = dict(event, amount=difference, seq=self.last_seq + 1, recorded_at=recorded_at,
+                         community_id=self.community_id)
+            self._apply(event)
+            new_events.append(event)
+
+            resident_id = event['resident_id']
+            event_count = self.event_counts[resident_id]
+            snapshot = (event['seq'], self.balances[resident_id], event_count)
+            if event_count % self.snapshot_interval == 0:
+                new_snapshots.append((resident_id,) + snapshot)
+            # The history is only kept current once it's been loaded; otherwise it's read from the files
+            if self.history_loaded:
+                self._index_history(event)
+                if event_count % self.snapshot_interval == 0:
+                    self._resident_snapshots.setdefault(resident_id, []).append(snapshot)
+
+        if new_events:
+            self._append_rows(self.ledger_file, EVENT_FIELDS, new_events)
+        if new_snapshots:
+            self._append_rows(self.snapshot_file, SNAPSHOT_FIELDS,
+                              [dict(zip(SNAPSHOT_FIELDS, s)) for s in new_snapshots])
+        if new_events:
+            self.write_state()
+
+        return len(new_events)
+
+    def write_state(self):
+        """Persist every resident's current balance and every source's net amount, so opening the ledger
+        doesn't need the event log"""
+        balance_rows = [
+            {'community_id': self.community_id, 'resident_id': resident_id, 'seq': self.last_seqs[resident_id],
+             'balance': balance, 'event_count': self.event_counts[resident_id],
+             'last_event_date': self.last_event_dates.get(resident_id, '')}
+            for resident_id, balance in sorted(self.balances.items())
+        ]
+        source_rows = [
+            {'community_id': self.community_id, 'source_ref': source_ref, 'resident_id': event['resident_id'],
+             'event_type': event['event_type'], 'description': event['description'],
+             'amount': self.source_amounts[source_ref], 'event_date': event['event_date'] or ''}
+            for source_ref, event in sorted(self.source_events.items())
+        ]
+        self._write_rows(self.sources_file, SOURCE_FIELDS, source_rows)
+        # Written last: its seqs tell a later load whether the state caught up with the event log
+        self._write_rows(self.balances_file, BALANCE_FIELDS, balance_rows)
+
+    @staticmethod
+    def _write_rows(path: str, fieldnames: List[str], rows: List[Dict]):
+        """Replace a CSV file atomically"""
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_file, path)
+
+    @staticmethod
+    def _append_rows(path: str, fieldnames: List[str], rows: List[Dict]):
+        """Append rows to a CSV file, writing the header on first use (existing files keep their columns)"""
+        write_header = not Path(path).exists() or Path(path).stat().st_size == 0
+        if not write_header:
+            with open(path, 'r', encoding='utf-8') as f:
+                fieldnames = next(csv.reader(f))
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def balance(self, resident_id: str) -> float:
+        """Current balance owed by a resident (negative means in credit)"""
+        return self.balances.get(resident_id, 0.0)
+
+    def balance_at_seq(self, resident_id: str, seq: int) -> float:
+        """Balance of a resident after ledger event `seq`, replayed from the nearest snapshot"""
+        self._load_history()
+        seqs = self.resident_events.get(resident_id, [])
+        snapshots = self.resident_snapshots.get(resident_id, [])
+
+        # Latest snapshot taken at or before seq
+        i = bisect.bisect_right(snapshots, (seq, float('inf'), float('inf'))) - 1
+        if i >= 0:
+            _, balance, event_count = snapshots[i]
+        else:
+            balance, event_count = 0.0, 0
+
+        end = bisect.bisect_right(seqs, seq)
+        for event_seq in seqs[event_count:end]:
+            event = self.events[event_seq - 1]
+            balance = round(balance + signed_amount(event['event_type'], event['amount']), 2)
+        return balance
+
+    def balance_recorded_as_of(self, resident_id: str, when: str) -> float:
+        """Audit query: balance as the ledger recorded it at time `when` (YYYY-MM-DD[ HH:MM:SS])"""
+        if len(when) == 10:
+            when += ' 23:59:59'
+        self._load_history()
+        seq = bisect.bisect_right(self.recorded_at, when)
+        return self.balance_at_seq(resident_id, seq)
+
+    def _date_timeline(self, resident_id: str) -> tuple:
+        """A resident's events ordered by event date, with the balance after each one"""
+        self._load_history()
+        if resident_id not in self.date_timelines:
+            events = [self.events[seq - 1] for seq in self.resident_events.get(resident_id, [])]
+            # Undated payments settle a fee, so they take the date it was charged;
+            # undated events with no matching charge (e.g. brought-forward credits) count from the start
+            charge_dates = {e['description']: e['event_date'] for e in events
+                            if e['event_type'] == 'charge' and e['event_date']}
+            dated = sorted(
+                ((e['event_date'] or charge_dates.get(e['description']) or '', e['seq']), e) for e in events
+            )
+            dates = []
+            balances = []
+            balance = 0.0
+            for (event_date, _), event in dated:
+                balance = round(balance + signed_amount(event['event_type'], event['amount']), 2)
+                dates.append(event_date)
+                balances.append(balance)
+            self.date_timelines[resident_id] = (dates, balances)
+        return self.date_timelines[resident_id]
+
+    def balance_as_of(self, resident_id: str, date: str) -> float:
+        """Balance of a resident counting only charges and payments dated on or before `date` (YYYY-MM-DD)
+        From the resident's latest event date on, that's the current balance; earlier dates need the event log,
+        since backdated events make date order differ from the snapshots' sequence order"""
+        if date[:10] >= self.last_event_dates.get(resident_id, ''):
+            return self.balance(resident_id)
+        dates, balances = self._date_timeline(resident_id)
+        i = bisect.bisect_right(dates, date[:10])
+        return balances[i - 1] if i else 0.0
+
+    def rebuild_snapshots(self):
+        """Recompute every snapshot and the persisted state from the event log"""
+        self._load_history()
+        self._replay_state()
+        self._resident_snapshots = {}
+        counts = {}
+        running = {}
+        rows = []
+
+        for event in self._events:
+            resident_id = event['resident_id']
+            running[resident_id] = round(running.get(resident_id, 0.0)
+                                         + signed_amount(event['event_type'], event['amount']), 2)
+            counts[resident_id] = counts.get(resident_id, 0) + 1
+            if counts[resident_id] % self.snapshot_interval == 0:
+                snapshot = (event['seq'], running[resident_id], counts[resident_id])
+                self._resident_snapshots.setdefault(resident_id, []).append(snapshot)
+                rows.append(dict(zip(SNAPSHOT_FIELDS, (resident_id,) + snapshot)))
+
+        self._write_rows(self.snapshot_file, SNAPSHOT_FIELDS, rows)
+        self.write_state()
+
+    def verify(self, invoices_file: str = None, payments_file: str = None) -> List[str]:
+        """Replay the whole event log and report any snapshot, persisted state or double-counted payment that
+        disagrees, and, given the source CSVs, any fee whose recorded amount differs from them"""
+        problems = []
+        running = {}
+        counts = {}
+        sources = {}
+        expected = {}
+        settled = {}
+
+        for i, event in enumerate(self.events, start=1):
+            if event['seq'] != i:
+                problems.append(f"Event sequence gap: expected {i}, found {event['seq']}")
+            resident_id = event['resident_id']
+            running[resident_id] = round(running.get(resident_id, 0.0)
+                                         + signed_amount(event['event_type'], event['amount']), 2)
+            counts[resident_id] = counts.get(resident_id, 0) + 1
+            sources[event['source_ref']] = round(sources.get(event['source_ref'], 0.0) + event['amount'], 2)
+            expected[(resident_id, event['seq'])] = (running[resident_id], counts[resident_id])
+            # Adjustments share their source_ref; a second source for the same fee is a double count
+            if event['event_type'] != 'charge':
+                key = (resident_id, event['description'])
+                first = settled.setdefault(key, event)
+                if first['source_ref'] != event['source_ref']:
+                    problems.append(f"{resident_id}: {event['description']} paid twice "
+                                    f"(seq {first['seq']} and {event['seq']})")
+
+        for resident_id, snapshots in self.resident_snapshots.items():
+            for seq, balance, event_count in snapshots:
+                actual = expected.get((resident_id, seq))
+                if actual is None:
+                    problems.append(f"{resident_id}: snapshot at seq {seq} has no matching event")
+                elif abs(actual[0] - balance) > 0.005 or actual[1] != event_count:
+                    problems.append(f"{resident_id}: snapshot at seq {seq} says {balance:.2f} "
+                                    f"({event_count} events), replay gives {actual[0]:.2f} ({actual[1]} events)")
+
+        for resident_id, balance in running.items():
+            if abs(self.balance(resident_id) - balance) > 0.005:
+                problems.append(f"{resident_id}: running balance {self.balance(resident_id):.2f} "
+                                f"!= replayed {balance:.2f}")
+
+        for resident_id, row in read_balances(self.balances_file).items():
+            if abs(float(row['balance']) - running.get(resident_id, 0.0)) > 0.005:
+                problems.append(f"{resident_id}: {self.balances_file} says {float(row['balance']):.2f}, "
+                                f"replayed {running.get(resident_id, 0.0):.2f}")
+            elif int(row['event_count']) != counts.get(resident_id, 0):
+                problems.append(f"{resident_id}: {self.balances_file} counts {row['event_count']} events, "
+                                f"replay has {counts.get(resident_id, 0)}")
+        if Path(self.sources_file).exists():
+            with open(self.sources_file, 'r', encoding='utf-8') as f:
+                persisted = {row['source_ref']: float(row['amount']) for row in csv.DictReader(f)}
+            for source_ref in sorted(set(persisted) | set(sources)):
+                if abs(persisted.get(source_ref, 0.0) - sources.get(source_ref, 0.0)) > 0.005:
+                    problems.append(f"{source_ref}: {self.sources_file} says {persisted.get(source_ref, 0.0):.2f}, "
+                                    f"replayed {sources.get(source_ref, 0.0):.2f}")
+        for path in (self.balances_file, self.sources_file):
+            if running and not Path(path).exists():
+                problems.append(f"{path} is missing; run resnapshot")
+
+        if invoices_file:
+            expected_events = charge_events_from_invoices(read_community_rows(invoices_file, self.community_id))
+            problems += self._compare_sources(invoices_file, expected_events, {'charge'})
+        if payments_file:
+            expected_events = payment_events_from_payments(read_community_rows(payments_file, self.community_id))
+            problems += self._compare_sources(payments_file, expected_events, {'payment', 'credit'})
+
+        return problems
+
+    def _compare_sources(self, source_file: str, expected_events: List[Dict], event_types: set) -> List[str]:
+        """Differences between the net amount recorded per source and the amounts in a source CSV"""
+        problems = []
+        expected = {}
+        for event in expected_events:
+            expected.setdefault(event['source_ref'], round(event['amount'], 2))
+
+        for source_ref, event in sorted(self.source_events.items()):
+            if event['event_type'] not in event_types:
+                continue
+            recorded = self.source_amounts[source_ref]
+            amount = expected.get(source_ref, 0.0)
+            if abs(recorded - amount) > 0.005:
+                where = f"{source_file} has {amount:.2f}" if source_ref in expected else f"not in {source_file}"
+                problems.append(f"{source_ref}: ledger has {recorded:.2f}, {where}")
+        for source_ref, amount in sorted(expected.items()):
+            if source_ref not in self.source_events and abs(amount) > 0.005:
+                problems.append(f"{source_ref}: {source_file} has {amount:.2f}, missing from the ledger")
+        return problems
+
+
+def charge_events_from_invoices(invoices: List[Dict]) -> List[Dict]:
+    """Turn invoice records into charge events (one charge per resident and fee)"""
+    events = []
+    for invoice in invoices:
+        description = invoice['description']
+        if not invoice['resident_id'] or is_credit_description(description):
+            continue
+        if invoice.get('status') == 'CANCELLED':
+            continue
+        events.append({
+            'community_id': invoice.get('community_id') or DEFAULT_COMMUNITY,
+            'resident_id': invoice['resident_id'],
+            'event_type': 'charge',
+            'source_ref': f"charge:{invoice['resident_id']}:{description}",
+            'description': description,
+            'amount': float(invoice['amount']),
+            'event_date': invoice['invoice_date']
+        })
+    return events
+
+
+def payment_events_from_payments(payments: List[Dict]) -> List[Dict]:
+    """Turn ingested payment records into payment and credit events (one per resident and fee)"""
+    events = []
+    seen = set()
+    for payment in payments:
+        resident_id = payment['resident_id']
+        description = payment['description']
+        if not resident_id or not description:
+            continue
+
+        # The same fee can be listed on several sheets (e.g. "Fee Halya 1" and "Sticker"); count it once
+        if (resident_id, description) in seen:
+            continue
+        seen.add((resident_id, description))
+
+        event_type = 'credit' if is_credit_description(description) else 'payment'
+        payment_date = payment.get('payment_date')
+
+        events.append({
+            'community_id': payment.get('community_id') or DEFAULT_COMMUNITY,
+            'resident_id': resident_id,
+            'event_type': event_type,
+            'source_ref': f"{event_type}:{resident_id}:{description}",
+            'description': description,
+            'amount': float(payment['amount']),
+            'event_date': payment_date if payment_date and payment_date == payment_date else None
+        })
+    return events
+
+
+def record_charges(invoices: List[Dict], community_id: str = DEFAULT_COMMUNITY,
+                   ledger_file: str = LEDGER_FILE, snapshot_file: str = SNAPSHOT_FILE,
+                   balances_file: str = BALANCES_FILE, sources_file: str = SOURCES_FILE,
+                   complete: bool = False) -> int:
+    """Record a community's generated invoices as charges; with `complete`, they are all of its invoices
+    and recorded charges missing from them are reversed"""
+    ledger = ResidentLedger(ledger_file, snapshot_file, balances_file=balances_file, community_id=community_id,
+                            sources_file=sources_file)
+    events = charge_events_from_invoices([i for i in invoices if in_community(i, community_id)])
+    return ledger.append(events, {'charge'} if complete else ())
+
+
+def record_payments(payments: List[Dict], community_id: str = DEFAULT_COMMUNITY,
+                    ledger_file: str = LEDGER_FILE, snapshot_file: str = SNAPSHOT_FILE,
+                    balances_file: str = BALANCES_FILE, sources_file: str = SOURCES_FILE,
+                    complete: bool = False) -> int:
+    """Record a community's ingested payments as payment/credit events; with `complete`, they are all of
+    its payments and recorded ones missing from them are reversed"""
+    ledger = ResidentLedger(ledger_file, snapshot_file, balances_file=balances_file, community_id=community_id,
+                            sources_file=sources_file)
+    events = payment_events_from_payments([p for p in payments if in_community(p, community_id)])
+    return ledger.append(events, {'payment', 'credit'} if complete else ())
+
+
+def read_balances(balances_file: str = BALANCES_FILE) -> Dict[str, Dict]:
+    """Persisted current balances by resident, without loading the event log"""
+    if not Path(balances_file).exists():
+        return {}
+    with open(balances_file, 'r', encoding='utf-8') as f:
+        return {row['resident_id']: row for row in csv.DictReader(f)}
+
+
+def rebuild_ledger(invoices_file: str, payments_file: str, ledger_file: str = LEDGER_FILE,
+                   snapshot_file: str = SNAPSHOT_FILE, balances_file: str = BALANCES_FILE,
+                   community_id: str = DEFAULT_COMMUNITY, sources_file: str = SOURCES_FILE) -> ResidentLedger:
+    """Rebuild a community's ledger from scratch out of the invoice and payment CSVs"""
+    for path in (ledger_file, snapshot_file, balances_file, sources_file):
+        if Path(path).exists():
+            Path(path).unlink()
+
+    ledger = ResidentLedger(ledger_file, snapshot_file, balances_file=balances_file, community_id=community_id,
+                            sources_file=sources_file)
+    ledger.append(charge_events_from_invoices(read_community_rows(invoices_file, community_id)))
+    ledger.append(payment_events_from_payments(read_community_rows(payments_file, community_id)))
+    return ledger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident running-balance ledger')
+    parser.add_argument('--ledger', default=LEDGER_FILE)
+    parser.add_argument('--snapshots', default=SNAPSHOT_FILE)
+    parser.add_argument('--balances', default=BALANCES_FILE)
+    parser.add_argument('--sources', default=SOURCES_FILE)
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = subparsers.add_parser('rebuild', help='Rebuild the ledger from invoice and payment CSVs')
+    rebuild.add_argument('--invoices', default='invoices_for_all_residents.csv')
+    rebuild.add_argument('--payments', default='payments_unique_id.csv')
+
+    verify = subparsers.add_parser('verify', help='Check snapshots and balances against a full replay, '
+                                                  'and recorded amounts against the source CSVs')
+    verify.add_argument('--invoices', default='invoices_for_all_residents.csv')
+    verify.add_argument('--payments', default='payments_unique_id.csv')
+    subparsers.add_parser('resnapshot', help='Recompute all snapshots from the event log')
+
+    balance = subparsers.add_parser('balance', help='Show the balance of a resident')
+    balance.add_argument('resident_id')
+    balance.add_argument('--as-of', help='Balance from charges and payments dated on or before YYYY-MM-DD')
+    balance.add_argument('--recorded-as-of',
+                         help='Audit: balance as recorded in the ledger at YYYY-MM-DD[ HH:MM:SS]')
+
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        ledger = rebuild_ledger(args.invoices, args.payments, args.ledger, args.snapshots, args.balances,
+                                args.community, args.sources)
+        snapshot_count = sum(len(s) for s in ledger.resident_snapshots.values())
+        print(f"Rebuilt ledger with {ledger.last_seq} events and {snapshot_count} snapshots")
+        print(f"Total outstanding: RM {sum(ledger.balances.values()):,.2f}")
+        return
+
+    ledger = ResidentLedger(args.ledger, args.snapshots, balances_file=args.balances, community_id=args.community,
+                            sources_file=args.sources)
+
+    if args.command == 'verify':
+        problems = ledger.verify(args.invoices if Path(args.invoices).exists() else None,
+                                 args.payments if Path(args.payments).exists() else None)
+        if problems:
+            print(f"Ledger verification FAILED ({len(problems)} problems):")
+            for problem in problems:
+                print(f"  - {problem}")
+            raise SystemExit(1)
+        print(f"Ledger OK: {len(ledger.events)} events, {len(ledger.balances)} residents")
+    elif args.command == 'resnapshot':
+        ledger.rebuild_snapshots()
+        snapshot_count = sum(len(s) for s in ledger.resident_snapshots.values())
+        print(f"Rewrote {snapshot_count} snapshots to {args.snapshots}")
+    elif args.command == 'balance':
+        if args.as_of:
+            amount = ledger.balance_as_of(args.resident_id, args.as_of)
+            print(f"{args.resident_id} balance as of {args.as_of}: RM {amount:,.2f}")
+        elif args.recorded_as_of:
+            amount = ledger.balance_recorded_as_of(args.resident_id, args.recorded_as_of)
+            print(f"{args.resident_id} balance recorded as of {args.recorded_as_of}: RM {amount:,.2f}")
+        else:
+            print(f"{args.resident_id} balance: RM {ledger.balance(args.resident_id):,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Trigram search index over resident names and house codes
+Trigrams follow pg_trgm's rules so ranking matches the GIN indexes in the schema
+"""
+
+import argparse
+import csv
+import math
+import random
+import re
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from communities import DEFAULT_COMMUNITY, in_community
+
+# pg_trgm's default similarity threshold
+SIMILARITY_THRESHOLD = 0.3
+
+# Names at least this similar under different resident IDs are flagged as probable duplicates
+DUPLICATE_THRESHOLD = 0.7
+
+# Trigrams found in at least 1/DENSE_FRACTION of residents are stored densely too
+DENSE_FRACTION = 20
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# A whole query shaped like a house code, e.g. "A23", "a023" or "B-5"
+HOUSE_CODE_QUERY = re.compile(r'^\s*([A-Za-z])\s?-?\s?(\d{1,3})\s*$')
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of a string the way pg_trgm builds them: per word, padded '  word '"""
+    result = set()
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+def similarity(a: str, b: str) -> float:
+    """pg_trgm's similarity() of two strings: shared trigrams over all trigrams"""
+    a_grams, b_grams = trigrams(a), trigrams(b)
+    if not a_grams or not b_grams:
+        return 0.0
+    return len(a_grams & b_grams) / len(a_grams | b_grams)
+
+
+class TrigramIndex:
+    """Inverted trigram index over one text field, scored like pg_trgm's similarity()"""
+
+    def __init__(self, texts: List[str]):
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for position, text in enumerate(texts):
+            grams = trigrams(text)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.trigram_counts = np.array(sizes, dtype=np.int32)
+        self.min_trigrams = min((n for n in sizes if n), default=0)
+
+        # Very common trigrams ('bin', '  a', ...) also get a dense membership array
+        self.dense = {}
+        for gram, posting in self.postings.items():
+            if len(posting) * DENSE_FRACTION >= len(texts):
+                dense = np.zeros(len(texts), dtype=np.int32)
+                dense[posting] = 1
+                self.dense[gram] = dense
+
+    def similarity_scores(self, query: str, threshold: float = SIMILARITY_THRESHOLD):
+        """Return (positions, scores) of texts at least `threshold` similar to the query"""
+        query_grams = trigrams(query)
+        grams = sorted((g for g in query_grams if g in self.postings), key=lambda g: len(self.postings[g]))
+
+        # similarity >= t needs shared >= t * (q + r) / (1 + t), so a match shares at least
+        # `needed` trigrams and must appear in one of the rarest len(grams) - needed + 1
+        # posting lists; the common ones are only probed for the candidates found there
+        q = len(query_grams)
+        needed = max(1, math.ceil(threshold * q - 1e-9),
+                     math.ceil(threshold * (q + self.min_trigrams) / (1 + threshold) - 1e-9))
+        if len(grams) < needed:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        probe_count = len(grams) - needed + 1
+
+        # Run-length count the sorted hits; cheaper than np.unique or a dense bincount
+        hits = np.sort(np.concatenate([self.postings[g] for g in grams[:probe_count]]))
+        first = np.empty(len(hits), dtype=bool)
+        first[0] = True
+        np.not_equal(hits[1:], hits[:-1], out=first[1:])
+        starts = np.flatnonzero(first)
+        positions = hits[starts]
+        shared = np.diff(starts, append=len(hits))
+
+        # Drop candidates that cannot reach the bound for their own r even if they
+        # contain every remaining trigram
+        heavy = grams[probe_count:]
+        required = threshold * (q + self.trigram_counts[positions]) / (1 + threshold) - 1e-9
+        reachable = shared + len(heavy) >= required
+        positions, shared = positions[reachable], shared[reachable]
+
+        for gram in heavy:
+            if gram in self.dense:
+                shared += self.dense[gram][positions]
+            else:
+                posting = self.postings[gram]
+                found = np.searchsorted(posting, positions).clip(max=len(posting) - 1)
+                shared += posting[found] == positions
+
+        scores = shared / (q + self.trigram_counts[positions] - shared)
+        keep = scores >= threshold
+        return positions[keep], scores[keep]
+
+
+class ResidentSearchIndex:
+    """Ranked fuzzy lookup over resident names and IDs, matching search_residents() in the schema"""
+
+    def __init__(self, residents: List[Dict]):
+        self.resident_ids: List[str] = [resident['resident_id'] for resident in residents]
+        self.names: List[str] = [resident.get('resident_name') or '' for resident in residents]
+        self.id_positions: Dict[str, int] = {resident_id: position
+                                             for position, resident_id in enumerate(self.resident_ids)}
+
+        # Like the two GIN indexes, names and IDs are indexed separately and a resident scores
+        # the better of the two similarities
+        self.name_index = TrigramIndex(self.names)
+        self.id_index = TrigramIndex(self.resident_ids)
+
+        # Ties are broken by resident ID, as in ORDER BY score DESC, resident_id
+        self.id_ranks = np.empty(len(residents), dtype=np.int32)
+        self.id_ranks[np.argsort(np.array(self.resident_ids, dtype=object), kind='stable')] = \
+            np.arange(len(residents), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.resident_ids)
+
+    def _result(self, position: int, score: float) -> Dict:
+        return {
+            'resident_id': self.resident_ids[position],
+            'resident_name': self.names[position],
+            'score': round(float(score), 4)
+        }
+
+    def lookup_ids(self, query: str) -> List[int]:
+        """Position of the resident whose ID is the query, or the house code it's shaped like ("A23", "b-5")"""
+        resident_id = query.strip().upper()
+        if resident_id not in self.id_positions:
+            match = HOUSE_CODE_QUERY.match(query)
+            if not match:
+                return []
+            resident_id = f"{match.group(1).upper()}{int(match.group(2)):03d}"
+        position = self.id_positions.get(resident_id)
+        return [] if position is None else [position]
+
+    def similarity_scores(self, query: str, threshold: float = SIMILARITY_THRESHOLD):
+        """Return (positions, scores) of residents whose name or ID is at least `threshold` similar"""
+        positions, scores = self.name_index.similarity_scores(query, threshold)
+        id_positions, id_scores = self.id_index.similarity_scores(query, threshold)
+        if not len(id_positions):
+            return positions, scores
+
+        # Keep each resident's better score
+        positions = np.concatenate([positions, id_positions])
+        scores = np.concatenate([scores, id_scores])
+        order = np.lexsort((-scores, positions))
+        positions, scores = positions[order], scores[order]
+        first = np.flatnonzero(np.diff(positions, prepend=-1))
+        return positions[first], scores[first]
+
+    def search(self, query: str, limit: int = 10,
+               threshold: float = SIMILARITY_THRESHOLD) -> List[Dict]:
+        """Ranked fuzzy lookup by house code and/or resident name"""
+        results = []
+        seen = set()
+        for position in self.lookup_ids(query):
+            results.append(self._result(position, 1.0))
+            seen.add(position)
+        if len(results) >= limit:
+            return results[:limit]
+
+        positions, scores = self.similarity_scores(query, threshold)
+
+        # Exact house code hits may reappear here, so keep `limit` candidates
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            positions, scores = positions[top], scores[top]
+        order = np.lexsort((self.id_ranks[positions], -scores))
+
+        for i in order:
+            position = int(positions[i])
+            if position in seen:
+                continue
+            results.append(self._result(position, scores[i]))
+            if len(results) >= limit:
+                break
+        return results
+
+    def find_probable_duplicates(self, threshold: float = DUPLICATE_THRESHOLD) -> List[Dict]:
+        """Pairs of different residents whose names are at least `threshold` similar"""
+        duplicates = []
+        for position, name in enumerate(self.names):
+            if not name:
+                continue
+            positions, scores = self.name_index.similarity_scores(name, threshold)
+            for other, score in zip(positions, scores):
+                other = int(other)
+                if other > position:
+                    duplicates.append({
+                        'resident_id': self.resident_ids[position],
+                        'resident_name': name,
+                        'duplicate_resident_id': self.resident_ids[other],
+                        'duplicate_resident_name': self.names[other],
+                        'similarity': round(float(score), 4)
+                    })
+        duplicates.sort(key=lambda d: -d['similarity'])
+        return duplicates
+
+
+def load_index(residents_file: str, community_id: str = DEFAULT_COMMUNITY) -> ResidentSearchIndex:
+    """Build the index from a community's rows of a residents CSV"""
+    with open(residents_file, 'r', encoding='utf-8') as f:
+        return ResidentSearchIndex([row for row in csv.DictReader(f) if in_community(row, community_id)])
+
+
+def benchmark(resident_count: int = 100000, query_count: int = 2000):
+    """Time index build and ranked lookups over synthetic residents"""
+    rng = random.Random(42)
+    common_names = ['Muhammad', 'Nur', 'Siti', 'Ahmad', 'Mohd', 'Abdul', 'Tan', 'Lim', 'Wong', 'Lee',
+                    'Kumar', 'Raj', 'Devi', 'Aziz', 'Rahman', 'Ismail', 'Hassan', 'Ali', 'Chong', 'Ng']
+    letters = 'abdeghiklmnorstuyz'
+
+    def random_word():
+        return ''.join(rng.choice(letters) for _ in range(rng.randint(4, 8))).capitalize()
+
+    residents = []
+    for n in range(resident_count):
+        alley = chr(ord('A') + n // 4000)
+        residents.append({
+            'resident_id': f"{alley}{n % 4000 + 1:04d}",
+            'resident_name': f"{rng.choice(common_names)} {random_word()} Bin {random_word()}"
+        })
+
+    start = time.perf_counter()
+    index = ResidentSearchIndex(residents)
+    built = time.perf_counter()
+
+    # Query shapes users actually type: typo'd full names, single words, two-token prefixes, house codes
+    def typo(name):
+        cut = rng.randrange(len(name))
+        return name[:cut] + name[cut + 1:]
+
+    shapes = {
+        'full name with typo': lambda r: typo(r['resident_name']),
+        'single word': lambda r: rng.choice(r['resident_name'].split()),
+        'two tokens': lambda r: ' '.join(r['resident_name'].split()[:2]),
+        'common two tokens': lambda r: f"{rng.choice(common_names)} Bin",
+        'house code': lambda r: r['resident_id']
+    }
+
+    print(f"Indexed {resident_count} residents ({len(index.name_index.postings)} name trigrams) in {built - start:.2f}s")
+    print(f"{'query shape':<22}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for shape, make_query in shapes.items():
+        queries = [make_query(rng.choice(residents)) for _ in range(query_count)]
+        timings = []
+        for query in queries:
+            query_start = time.perf_counter()
+            index.search(query, limit=10)
+            timings.append((time.perf_counter() - query_start) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p95 = timings[int(len(timings) * 0.95)]
+        print(f"{shape:<22}{p50:>9.3f}{p95:>9.3f}{timings[-1]:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzzy search over resident names and house codes')
+    parser.add_argument('query', nargs='?', help='Name fragment or house code, e.g. "logaruthran" or "A23"')
+    parser.add_argument('--residents', default='residents_unique_id.csv')
+    parser.add_argument('--community', default=DEFAULT_COMMUNITY)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--duplicates', action='store_true', help='List probable duplicate residents')
+    parser.add_argument('--benchmark', action='store_true', help='Time lookups over 100k synthetic residents')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    index = load_index(args.residents, args.community)
+
+    if args.duplicates:
+        duplicates = index.find_probable_duplicates()
+        print(f"Found {len(duplicates)} probable duplicate residents")
+        for d in duplicates:
+            print(f"  {d['resident_id']} {d['resident_name']} ~ "
+                  f"{d['duplicate_resident_id']} {d['duplicate_resident_name']} ({d['similarity']:.2f})")
+        return
+
+    if not args.query:
+        parser.error('a query is required')
+
+    for result in index.search(args.query, limit=args.limit):
+        print(f"  {result['resident_id']}  {result['score']:.2f}  {result['resident_name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Run the data pipeline for every community in communities.json, one isolated worker per community
+Each community runs in its own process inside its own data directory, so its CSVs, ledger and
+outputs never mix with another community's, and a failure in one doesn't stop the rest
+"""
+
+import argparse
+import contextlib
+import datetime
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import normalized_processor
+from communities import COMMUNITIES_FILE, load_communities
+from export_collection_workbook import build_status_index, export_workbook
+from export_snapshots import export_snapshots
+from generate_invoices_for_all_residents import generate_invoices_for_all_residents
+from generate_statements import generate_statements
+
+STAGES = ['ingest', 'invoices', 'snapshots', 'statements', 'workbook']
+
+LOG_FILE = 'pipeline.log'
+
+# Recorded payments settle fees in every output; bank_payments.csv only exists once a statement is imported
+PAYMENTS_FILES = ['payments_unique_id.csv', 'bank_payments.csv']
+
+
+def existing_payments_files() -> List[str]:
+    """Payments CSVs present in the community's data directory"""
+    return [path for path in PAYMENTS_FILES if Path(path).exists()]
+
+
+def run_stage(stage: str, community: Dict, as_of: datetime.date, snapshot_root: Path, workers: int):
+    """Run one pipeline stage in the community's data directory"""
+    community_id = community['community_id']
+
+    if stage == 'ingest':
+        if not Path(community['workbook']).exists():
+            raise FileNotFoundError(f"{community['workbook']} not found")
+        normalized_processor.main(community['workbook'], community_id, write_schema=False)
+
+    elif stage == 'invoices':
+        generate_invoices_for_all_residents(community['fee_templates'], 'residents_unique_id.csv',
+                                            'invoices_for_all_residents.csv', community_id)
+
+    elif stage == 'snapshots':
+        result = export_snapshots('residents_unique_id.csv', existing_payments_files(),
+                                  'invoices_for_all_residents.csv', str(snapshot_root / community_id),
+                                  as_of, community_id=community_id)
+        print(f"Exported snapshots for {result['alleys']} alleys, rewrote {len(result['written'])}")
+
+    elif stage == 'statements':
+        result = generate_statements('invoices_for_all_residents.csv', 'residents_unique_id.csv', 'statements',
+                                     as_of=as_of, workers=workers, community_id=community_id,
+                                     payments_files=existing_payments_files())
+        print(f"Rendered {result['rendered']} statements, {result['skipped']} unchanged")
+
+    elif stage == 'workbook':
+        status_index = build_status_index('invoices_for_all_residents.csv', existing_payments_files(), as_of,
+                                          community_id)
+        output = Path(community['workbook']).with_name(Path(community['workbook']).stem + ' - Status.xlsx')
+        counts = export_workbook(community['workbook'], str(output), status_index)
+        print(f"Updated {counts['residents']} resident rows in {output}")
+
+
+def run_community(community: Dict, stages: List[str], as_of: datetime.date, snapshot_root: str,
+                  workers: int) -> Dict:
+    """Worker: run the requested stages for one community, logging to <data_dir>/pipeline.log"""
+    os.chdir(community['data_path'])
+    timings = {}
+    error = None
+
+    with open(LOG_FILE, 'a', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        print(f"=== {datetime.datetime.now():%Y-%m-%d %H:%M:%S} {community['community_id']}: {', '.join(stages)}")
+        for stage in stages:
+            start = time.perf_counter()
+            try:
+                run_stage(stage, community, as_of, Path(snapshot_root), workers)
+            except Exception as e:
+                traceback.print_exc()
+                error = f"{stage}: {e}"
+                break
+            finally:
+                timings[stage] = time.perf_counter() - start
+
+    return {'community_id': community['community_id'], 'timings': timings, 'error': error}
+
+
+def run_pipeline(communities: List[Dict], stages: List[str], as_of: datetime.date, snapshot_root: str,
+                 workers: Optional[int] = None) -> List[Dict]:
+    """Run every community in parallel; returns one result per community"""
+    workers = workers or min(len(communities), os.cpu_count() or 1)
+    # Split the CPUs between communities for the statement renderer's own process pool
+    render_workers = max(1, (os.cpu_count() or 1) // workers)
+
+    if workers == 1:
+        cwd = os.getcwd()
+        try:
+            return [run_community(c, stages, as_of, snapshot_root, render_workers) for c in communities]
+        finally:
+            os.chdir(cwd)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_community, c, stages, as_of, snapshot_root, render_workers)
+                   for c in communities]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return sorted(results, key=lambda r: r['community_id'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the data pipeline for each community in parallel')
+    parser.add_argument('--registry', default=COMMUNITIES_FILE)
+    parser.add_argument('--community', action='append', help='Community ID to run (repeatable), default all')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"Comma-separated stages to run, in order (default {','.join(STAGES)})")
+    parser.add_argument('--as-of', help='Date used to mark PENDING invoices OVERDUE (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, help='Communities processed at once (default: CPU count)')
+    parser.add_argument('--snapshots', default='public/data',
+                        help='Snapshot root; each community is written to <root>/<community_id>')
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)}; choose from {', '.join(STAGES)}")
+
+    communities = load_communities(args.registry)
+    if args.community:
+        known = {c['community_id'] for c in communities}
+        missing = [c for c in args.community if c not in known]
+        if missing:
+            parser.error(f"Unknown community: {', '.join(missing)}")
+        communities = [c for c in communities if c['community_id'] in args.community]
+
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else datetime.date.today()
+    snapshot_root = str(Path(args.snapshots).resolve())
+
+    start = time.perf_counter()
+    results = run_pipeline(communities, stages, as_of, snapshot_root, args.workers)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for result in results:
+        timings = ', '.join(f"{stage} {seconds:.1f}s" for stage, seconds in result['timings'].items())
+        if result['error']:
+            failed += 1
+            print(f"  {result['community_id']}: FAILED at {result['error']} ({timings})")
+        else:
+            print(f"  {result['community_id']}: ok ({timings})")
+    print(f"Processed {len(results)} communities in {elapsed:.1f}s; logs in each data directory's {LOG_FILE}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
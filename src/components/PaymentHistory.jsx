@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
-import { supabase } from '../lib/supabase'
+import { supabase, communityId } from '../lib/supabase'
+import { fetchSnapshotHistory } from '../lib/snapshots'
 import { ArrowLeft, DollarSign, Calendar, FileText, TrendingUp } from 'lucide-react'
 
 export default function PaymentHistory({ resident, onBack }) {
@@ -10,19 +11,38 @@ export default function PaymentHistory({ resident, onBack }) {
   useEffect(() => {
     if (!resident) return
 
-    async function fetchPayments() {
-      setLoading(true)
-      
-      // Fetch payments for this resident
-      const { data: paymentsData, error: paymentsError } = await supabase
+    async function fetchPaymentsData() {
+      // Residents loaded from a static snapshot link to their history file
+      if (resident.history) {
+        try {
+          const { payments } = await fetchSnapshotHistory(resident)
+          return payments
+        } catch (snapshotError) {
+          console.warn('Snapshot unavailable, querying Supabase:', snapshotError)
+        }
+      }
+
+      const { data, error } = await supabase
         .from('payments')
         .select('*')
+        .eq('community_id', communityId)
         .eq('resident_id', resident.resident_id)
         .order('year', { ascending: false })
         .order('description')
+
+      if (error) {
+        console.error('Error fetching payments:', error)
+        return null
+      }
+      return data
+    }
+
+    async function fetchPayments() {
+      setLoading(true)
       
-      if (paymentsError) {
-        console.error('Error fetching payments:', paymentsError)
+      // Fetch payments for this resident
+      const paymentsData = await fetchPaymentsData()
+      if (!paymentsData) {
         setLoading(false)
         return
       }
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
-import { supabase } from '../lib/supabase'
+import { supabase, communityId } from '../lib/supabase'
+import { fetchSnapshotAlleys, fetchSnapshotResidents } from '../lib/snapshots'
 import { Search, Home, MapPin } from 'lucide-react'
 
 export default function ResidentSelector({ onResidentSelect }) {
@@ -11,9 +12,17 @@ export default function ResidentSelector({ onResidentSelect }) {
   // Fetch unique alleys
   useEffect(() => {
     async function fetchAlleys() {
+      try {
+        setAlleys(await fetchSnapshotAlleys())
+        return
+      } catch (snapshotError) {
+        console.warn('Snapshots unavailable, querying Supabase:', snapshotError)
+      }
+
       const { data, error } = await supabase
         .from('residents')
         .select('alley')
+        .eq('community_id', communityId)
         .order('alley')
       
       if (error) {
@@ -37,9 +46,18 @@ export default function ResidentSelector({ onResidentSelect }) {
 
     async function fetchResidents() {
       setLoading(true)
+      try {
+        setResidents(await fetchSnapshotResidents(selectedAlley))
+        setLoading(false)
+        return
+      } catch (snapshotError) {
+        console.warn('Snapshots unavailable, querying Supabase:', snapshotError)
+      }
+
       const { data, error } = await supabase
         .from('residents')
         .select('*')
+        .eq('community_id', communityId)
         .eq('alley', selectedAlley)
         .order('house_number')
       
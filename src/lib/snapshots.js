@@ -0,0 +1,73 @@
+import { communityId } from './supabase'
+
+// Static JSON snapshots written by export_snapshots.py (public/data/<community> is served as /data/<community>)
+const SNAPSHOT_BASE = import.meta.env.VITE_SNAPSHOT_BASE || `/data/${communityId}`
+const SNAPSHOT_VERSION = 1
+
+let indexPromise = null
+const fileCache = new Map()
+
+function rowsToObjects({ columns, rows }) {
+  return rows.map(row => Object.fromEntries(columns.map((column, i) => [column, row[i]])))
+}
+
+async function fetchJson(path, options) {
+  const response = await fetch(`${SNAPSHOT_BASE}/${path}`, options)
+  if (!response.ok) {
+    throw new Error(`Failed to load snapshot ${path}: ${response.status}`)
+  }
+  return response.json()
+}
+
+// index.json changes on every export, so always revalidate it
+export function fetchSnapshotIndex() {
+  if (!indexPromise) {
+    indexPromise = fetchJson('index.json', { cache: 'no-cache' })
+      .then(index => {
+        if (index.v !== SNAPSHOT_VERSION) {
+          throw new Error(`Unsupported snapshot version ${index.v}`)
+        }
+        return index
+      })
+      .catch(error => {
+        indexPromise = null
+        throw error
+      })
+  }
+  return indexPromise
+}
+
+// Alley and resident files are content-hashed, so they never change once fetched
+function fetchImmutable(path) {
+  if (!fileCache.has(path)) {
+    fileCache.set(path, fetchJson(path).catch(error => {
+      fileCache.delete(path)
+      throw error
+    }))
+  }
+  return fileCache.get(path)
+}
+
+export async function fetchSnapshotAlleys() {
+  const index = await fetchSnapshotIndex()
+  return Object.keys(index.alleys).sort()
+}
+
+export async function fetchSnapshotResidents(alley) {
+  const index = await fetchSnapshotIndex()
+  const entry = index.alleys[alley]
+  if (!entry) return []
+
+  const snapshot = await fetchImmutable(entry.file)
+  return rowsToObjects(snapshot.houses).map(house => ({ ...house, alley }))
+}
+
+export async function fetchSnapshotHistory(resident) {
+  const snapshot = await fetchImmutable(resident.history)
+  const payments = rowsToObjects(snapshot.payments).map((payment, i) => ({
+    ...payment,
+    id: `${snapshot.resident_id}-${i}`,
+    resident_id: snapshot.resident_id
+  }))
+  return { payments, invoices: rowsToObjects(snapshot.invoices) }
+}
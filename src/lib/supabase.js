@@ -5,4 +5,7 @@ const supabaseAnonKey = 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJzdXBhYm
 
 export const supabase = createClient(supabaseUrl, supabaseAnonKey)
 
+// Resident IDs are only unique within a community, so every query is scoped to one
+export const communityId = import.meta.env.VITE_COMMUNITY_ID || 'halya1'
+
 
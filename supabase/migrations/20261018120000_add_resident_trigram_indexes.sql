@@ -0,0 +1,25 @@
+-- Add trigram indexes for fuzzy resident lookup
+-- Matches the ranking used by resident_search.py (pg_trgm similarity, default threshold 0.3)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_residents_name_trgm ON residents USING GIN (resident_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_residents_id_trgm ON residents USING GIN (resident_id gin_trgm_ops);
+
+-- Ranked fuzzy search over resident names and house codes
+-- Usage: SELECT * FROM search_residents('logaruthran');
+CREATE OR REPLACE FUNCTION search_residents(query TEXT, result_limit INTEGER DEFAULT 10)
+RETURNS TABLE (
+    resident_id VARCHAR(10),
+    alley VARCHAR(10),
+    house_number INTEGER,
+    resident_name VARCHAR(255),
+    score REAL
+) AS $$
+    SELECT r.resident_id, r.alley, r.house_number, r.resident_name,
+           GREATEST(similarity(r.resident_name, query), similarity(r.resident_id, query)) AS score
+    FROM residents r
+    WHERE r.resident_name % query OR r.resident_id % query
+    ORDER BY score DESC, r.resident_id
+    LIMIT result_limit;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,247 @@
+-- Partition residents, payments and invoices by community
+-- Resident IDs like "A001" are only unique within a community, so every key now leads with community_id.
+-- Existing rows become community 'halya1'. Add a community with:
+--   SELECT create_community_partitions('halya2', 'Halya 2');
+
+-- Keep the existing rows while the tables are rebuilt as partitioned tables
+CREATE TEMP TABLE residents_existing AS SELECT * FROM residents;
+CREATE TEMP TABLE payments_existing AS SELECT * FROM payments;
+CREATE TEMP TABLE invoices_existing AS SELECT * FROM invoices;
+
+DROP FUNCTION IF EXISTS search_residents(TEXT, INTEGER);
+DROP FUNCTION IF EXISTS generate_invoice_number();
+DROP VIEW IF EXISTS invoice_summary;
+DROP VIEW IF EXISTS payment_summary;
+DROP VIEW IF EXISTS resident_summary;
+DROP TABLE invoices;
+DROP TABLE payments;
+DROP TABLE residents;
+
+-- Communities table
+CREATE TABLE communities (
+    community_id VARCHAR(20) PRIMARY KEY,  -- e.g., "halya1"
+    name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Residents table
+CREATE TABLE residents (
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1' REFERENCES communities(community_id),
+    resident_id VARCHAR(10) NOT NULL,  -- e.g., "A001", "B023" (unique within a community)
+    alley VARCHAR(10) NOT NULL,
+    house_number INTEGER NOT NULL,
+    resident_name VARCHAR(255) NOT NULL,
+    sheet_name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, resident_id),
+    UNIQUE(community_id, alley, house_number)  -- Ensure alley+house_number is unique per community
+) PARTITION BY LIST (community_id);
+
+-- Payments table
+CREATE TABLE payments (
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1',
+    id SERIAL,
+    resident_id VARCHAR(10) NOT NULL,
+    payment_date DATE,
+    description VARCHAR(255) NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    year INTEGER,
+    sheet_name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, id),
+    FOREIGN KEY (community_id, resident_id) REFERENCES residents(community_id, resident_id) ON DELETE CASCADE
+) PARTITION BY LIST (community_id);
+
+-- Invoices table
+CREATE TABLE invoices (
+    community_id VARCHAR(20) NOT NULL DEFAULT 'halya1',
+    invoice_id SERIAL,
+    resident_id VARCHAR(10) NOT NULL,
+    invoice_number VARCHAR(50) NOT NULL,
+    invoice_date DATE NOT NULL,
+    due_date DATE NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    status VARCHAR(20) DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PAID', 'OVERDUE', 'CANCELLED')),
+    payment_id INTEGER,
+    year INTEGER,
+    month INTEGER CHECK (month >= 1 AND month <= 12),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (community_id, invoice_id),
+    UNIQUE(community_id, invoice_number),
+    FOREIGN KEY (community_id, resident_id) REFERENCES residents(community_id, resident_id) ON DELETE CASCADE,
+    FOREIGN KEY (community_id, payment_id) REFERENCES payments(community_id, id) ON DELETE SET NULL (payment_id)
+) PARTITION BY LIST (community_id);
+
+-- Create the partitions of residents/payments/invoices for a community.
+-- Each community gets its own tables and indexes, so adding one doesn't touch the others.
+CREATE OR REPLACE FUNCTION create_community_partitions(p_community_id VARCHAR(20), p_name VARCHAR(255))
+RETURNS VOID AS $$
+BEGIN
+    IF p_community_id !~ '^[a-z][a-z0-9_]{0,19}$' THEN
+        RAISE EXCEPTION 'Invalid community ID: %', p_community_id;
+    END IF;
+
+    INSERT INTO communities (community_id, name) VALUES (p_community_id, p_name)
+    ON CONFLICT (community_id) DO NOTHING;
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF residents FOR VALUES IN (%L)',
+                   'residents_' || p_community_id, p_community_id);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF payments FOR VALUES IN (%L)',
+                   'payments_' || p_community_id, p_community_id);
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF invoices FOR VALUES IN (%L)',
+                   'invoices_' || p_community_id, p_community_id);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_community_partitions('halya1', 'Halya 1');
+
+INSERT INTO residents (community_id, resident_id, alley, house_number, resident_name, sheet_name, created_at, updated_at)
+SELECT 'halya1', resident_id, alley, house_number, resident_name, sheet_name, created_at, updated_at
+FROM residents_existing;
+
+INSERT INTO payments (community_id, id, resident_id, payment_date, description, amount, year, sheet_name, created_at, updated_at)
+SELECT 'halya1', id, resident_id, payment_date, description, amount, year, sheet_name, created_at, updated_at
+FROM payments_existing;
+
+INSERT INTO invoices (community_id, invoice_id, resident_id, invoice_number, invoice_date, due_date, description,
+                      amount, status, payment_id, year, month, created_at, updated_at)
+SELECT 'halya1', invoice_id, resident_id, invoice_number, invoice_date, due_date, description,
+       amount, status, payment_id, year, month, created_at, updated_at
+FROM invoices_existing;
+
+-- Continue the serial IDs after the copied rows
+SELECT setval(pg_get_serial_sequence('payments', 'id'), COALESCE((SELECT MAX(id) FROM payments), 0) + 1, false);
+SELECT setval(pg_get_serial_sequence('invoices', 'invoice_id'), COALESCE((SELECT MAX(invoice_id) FROM invoices), 0) + 1, false);
+
+DROP TABLE residents_existing;
+DROP TABLE payments_existing;
+DROP TABLE invoices_existing;
+
+-- Indexes for better query performance
+-- Indexes on partitioned tables are created on every community partition
+CREATE INDEX idx_residents_house_number ON residents(house_number);
+CREATE INDEX idx_residents_name ON residents(resident_name);
+CREATE INDEX idx_residents_alley ON residents(alley);
+CREATE INDEX idx_residents_name_trgm ON residents USING GIN (resident_name gin_trgm_ops);
+CREATE INDEX idx_residents_id_trgm ON residents USING GIN (resident_id gin_trgm_ops);
+CREATE INDEX idx_payments_resident_id ON payments(community_id, resident_id);
+CREATE INDEX idx_payments_year ON payments(year);
+CREATE INDEX idx_payments_description ON payments(description);
+CREATE INDEX idx_invoices_resident_id ON invoices(community_id, resident_id);
+CREATE INDEX idx_invoices_status ON invoices(status);
+CREATE INDEX idx_invoices_date ON invoices(invoice_date);
+CREATE INDEX idx_invoices_due_date ON invoices(due_date);
+CREATE INDEX idx_invoices_year_month ON invoices(year, month);
+CREATE INDEX idx_invoices_payment_id ON invoices(community_id, payment_id);
+
+-- View for resident summary with total payments
+CREATE VIEW resident_summary AS
+SELECT 
+    r.community_id,
+    r.resident_id,
+    r.alley,
+    r.house_number,
+    r.resident_name,
+    r.sheet_name,
+    COUNT(p.id) as total_payments,
+    SUM(p.amount) as total_amount,
+    AVG(p.amount) as avg_payment_amount
+FROM residents r
+LEFT JOIN payments p ON r.community_id = p.community_id AND r.resident_id = p.resident_id
+GROUP BY r.community_id, r.resident_id, r.alley, r.house_number, r.resident_name, r.sheet_name;
+
+-- View for payment summary by type
+CREATE VIEW payment_summary AS
+SELECT 
+    community_id,
+    description,
+    year,
+    COUNT(*) as payment_count,
+    SUM(amount) as total_amount,
+    AVG(amount) as avg_amount
+FROM payments
+GROUP BY community_id, description, year
+ORDER BY community_id, year DESC, total_amount DESC;
+
+-- View for invoice summary
+CREATE VIEW invoice_summary AS
+SELECT 
+    r.community_id,
+    r.resident_id,
+    r.alley,
+    r.house_number,
+    r.resident_name,
+    COUNT(i.invoice_id) as total_invoices,
+    SUM(CASE WHEN i.status = 'PAID' THEN i.amount ELSE 0 END) as paid_amount,
+    SUM(CASE WHEN i.status = 'PENDING' THEN i.amount ELSE 0 END) as pending_amount,
+    SUM(CASE WHEN i.status = 'OVERDUE' THEN i.amount ELSE 0 END) as overdue_amount,
+    COUNT(CASE WHEN i.status = 'PAID' THEN 1 END) as paid_count,
+    COUNT(CASE WHEN i.status = 'PENDING' THEN 1 END) as pending_count,
+    COUNT(CASE WHEN i.status = 'OVERDUE' THEN 1 END) as overdue_count
+FROM residents r
+LEFT JOIN invoices i ON r.community_id = i.community_id AND r.resident_id = i.resident_id
+GROUP BY r.community_id, r.resident_id, r.alley, r.house_number, r.resident_name;
+
+-- Triggers to automatically update updated_at
+CREATE TRIGGER update_residents_updated_at 
+    BEFORE UPDATE ON residents 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_payments_updated_at 
+    BEFORE UPDATE ON payments 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_invoices_updated_at 
+    BEFORE UPDATE ON invoices 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Trigger to automatically update invoice status
+CREATE TRIGGER update_invoice_status_trigger
+    BEFORE INSERT OR UPDATE ON invoices
+    FOR EACH ROW
+    EXECUTE FUNCTION update_invoice_status();
+
+-- Function to generate invoice number (numbered per community)
+CREATE OR REPLACE FUNCTION generate_invoice_number(p_community_id VARCHAR(20) DEFAULT 'halya1')
+RETURNS VARCHAR(50) AS $$
+DECLARE
+    next_number INTEGER;
+    invoice_num VARCHAR(50);
+BEGIN
+    SELECT COALESCE(MAX(CAST(SUBSTRING(invoice_number FROM 9) AS INTEGER)), 0) + 1
+    INTO next_number
+    FROM invoices
+    WHERE community_id = p_community_id
+      AND invoice_number LIKE 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-%';
+    
+    invoice_num := 'INV-' || EXTRACT(YEAR FROM CURRENT_DATE) || '-' || LPAD(next_number::TEXT, 6, '0');
+    RETURN invoice_num;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ranked fuzzy search over one community's resident names and house codes
+-- Usage: SELECT * FROM search_residents('logaruthran', 'halya1');
+CREATE OR REPLACE FUNCTION search_residents(query TEXT, p_community_id VARCHAR(20) DEFAULT 'halya1',
+                                            result_limit INTEGER DEFAULT 10)
+RETURNS TABLE (
+    resident_id VARCHAR(10),
+    alley VARCHAR(10),
+    house_number INTEGER,
+    resident_name VARCHAR(255),
+    score REAL
+) AS $$
+    SELECT r.resident_id, r.alley, r.house_number, r.resident_name,
+           GREATEST(similarity(r.resident_name, query), similarity(r.resident_id, query)) AS score
+    FROM residents r
+    WHERE r.community_id = p_community_id
+      AND (r.resident_name % query OR r.resident_id % query)
+    ORDER BY score DESC, r.resident_id
+    LIMIT result_limit;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,29 @@
+-- search_residents(): a query shaped like a house code ("A23", "b-5") also returns that house
+-- with score 1, matching resident_search.py
+
+-- Usage: SELECT * FROM search_residents('logaruthran', 'halya1');
+CREATE OR REPLACE FUNCTION search_residents(query TEXT, p_community_id VARCHAR(20) DEFAULT 'halya1',
+                                            result_limit INTEGER DEFAULT 10)
+RETURNS TABLE (
+    resident_id VARCHAR(10),
+    alley VARCHAR(10),
+    house_number INTEGER,
+    resident_name VARCHAR(255),
+    score REAL
+) AS $$
+    WITH q AS (
+        SELECT CASE WHEN query ~ '^\s*[A-Za-z]\s?-?\s?\d{1,3}\s*$'
+                    THEN upper(substring(query FROM '[A-Za-z]'))
+                         || lpad(substring(query FROM '\d{1,3}')::INTEGER::TEXT, 3, '0')
+               END AS house_code
+    )
+    SELECT r.resident_id, r.alley, r.house_number, r.resident_name,
+           CASE WHEN r.resident_id = q.house_code THEN 1::REAL
+                ELSE GREATEST(similarity(r.resident_name, query), similarity(r.resident_id, query))
+           END AS score
+    FROM residents r, q
+    WHERE r.community_id = p_community_id
+      AND (r.resident_id = q.house_code OR r.resident_name % query OR r.resident_id % query)
+    ORDER BY score DESC, r.resident_id
+    LIMIT result_limit;
+$$ LANGUAGE sql STABLE;